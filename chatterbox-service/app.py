@@ -5,14 +5,29 @@ This service provides text-to-speech synthesis using Chatterbox TTS
 (open-source alternative to ElevenLabs) for the AI Interview feature.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context, g
 from flask_cors import CORS
 import os
 import io
+import importlib.util
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import torch
-import torchaudio as ta
 import perth
 
+from text_segmentation import split_sentences, normalize_for_speech
+from voices import VoiceConditioningCache
+from audio_cache import SynthesisCache, voice_identity
+from encoding import OUTPUT_FORMATS, AudioEncoder, AudioEncodeError, wav_header, wav_to_pcm16, decode_wav16
+from stitching import crossfade_concat
+from scheduler import SynthesisQueue, QueueFullError, PRIORITY_LIVE, PRIORITY_PREFETCH
+from prefetch import PrefetchJob, PrefetchJobStore
+from models import MODEL_TYPES, ChatterboxModelPool, ModelLoadError
+from cpu_profile import CpuProfile
+from metrics import MetricsRegistry, StageTimer, rss_bytes, timed
+from startup import Startup
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Node.js backend
 
@@ -28,45 +43,154 @@ if not callable(getattr(perth, "PerthImplicitWatermarker", None)):
     print("⚠️ Perth implicit watermarker unavailable; continuing without audio watermarking")
     perth.PerthImplicitWatermarker = NoOpWatermarker
 
+# ============================================
+# METRICS (GET /metrics, Prometheus text format)
+# ============================================
+
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    'tts_request_duration_seconds', 'Request time including the response write', ('endpoint', 'status')
+)
+stage_seconds = metrics.histogram(
+    'tts_stage_duration_seconds', 'Time per request stage', ('endpoint', 'stage')
+)
+first_chunk_seconds = metrics.histogram(
+    'tts_stream_first_chunk_seconds', 'Time from request to the first streamed audio frame'
+)
+queue_wait_seconds = metrics.histogram('tts_queue_wait_seconds', 'Time a segment waited for the model')
+batch_seconds = metrics.histogram('tts_batch_generate_seconds', 'Model time per generation group')
+batch_size = metrics.histogram('tts_batch_size', 'Segments per generation group', buckets=(1, 2, 4, 8, 16))
+model_load_seconds = metrics.histogram(
+    'tts_model_load_seconds', 'Model load time', ('model',), buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+cache_results = metrics.counter('tts_synthesis_cache_total', 'Synthesis requests by cache status', ('status',))
+queue_rejections = metrics.counter('tts_queue_rejections_total', 'Requests rejected with 429 (queue full)')
+
+# Ask for a stage breakdown with `X-Profile: 1`; it comes back as `Server-Timing`
+PROFILE_HEADER_ENABLED = os.environ.get('PROFILE_HEADER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+metrics.gauge('tts_process_resident_memory_bytes', 'Resident memory of the service process', rss_bytes)
+metrics.gauge('tts_torch_threads', 'torch intra-op threads', torch.get_num_threads)
+metrics.gauge('tts_queue_depth', 'Live segments waiting for the model', lambda: synthesis_queue.stats()["queueDepth"])
+metrics.gauge(
+    'tts_prefetch_queue_depth', 'Prefetch segments waiting for the model',
+    lambda: synthesis_queue.stats()["prefetchDepth"]
+)
+metrics.gauge(
+    'tts_models_memory_bytes', 'Memory held by resident models',
+    lambda: int(model_pool.stats()["memoryUsedMb"] * 1024 * 1024)
+)
+
+
+@app.before_request
+def start_stage_timer():
+    g.timer = StageTimer()
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    timer = g.get('timer')
+    if timer is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if PROFILE_HEADER_ENABLED and request.headers.get('X-Profile') == '1':
+        # Streamed responses only cover the stages before the first frame
+        response.headers['Server-Timing'] = timer.server_timing(total=time.perf_counter() - g.started)
+
+    # Observed once the body has been written, so streamed sentences are included;
+    # `write` is the time from here to the last byte (the whole body when streaming)
+    started, handed_over, status = g.started, time.perf_counter(), str(response.status_code)
+
+    def observe():
+        finished = time.perf_counter()
+        timer.add('write', finished - handed_over)
+        timer.observe(stage_seconds, endpoint=endpoint)
+        request_seconds.observe(finished - started, endpoint=endpoint, status=status)
+
+    response.call_on_close(observe)
+    # send_file bodies are otherwise handed straight to the server's file wrapper,
+    # which never calls the response's close callbacks
+    response.direct_passthrough = False
+    return response
+
+
 # ============================================
 # CHATTERBOX TTS SETUP
 # ============================================
 
-chatterbox_model = None
-model_load_error = None
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-MODEL_TYPE = os.environ.get('CHATTERBOX_MODEL', 'turbo')  # turbo, standard, or multilingual
+MODEL_TYPE = os.environ.get('CHATTERBOX_MODEL', 'turbo')  # default model: turbo, standard, or multilingual
+
+# Models a request may select with "model"; each is loaded on first use
+ALLOWED_MODELS = [m.strip() for m in os.environ.get('CHATTERBOX_ALLOWED_MODELS', ','.join(MODEL_TYPES)).split(',') if m.strip()]
+if MODEL_TYPE not in ALLOWED_MODELS:
+    ALLOWED_MODELS.append(MODEL_TYPE)
+
+# Models to load at startup instead of on first request, e.g. "turbo" or "turbo,multilingual"
+WARMUP_MODELS = [m.strip() for m in os.environ.get('CHATTERBOX_WARMUP_MODELS', '').split(',') if m.strip()]
+
+# Threads, quantization, compile and warmup (TTS_CPU_PROFILE, see cpu_profile.py)
+cpu_profile = CpuProfile.from_env()
+cpu_profile.apply_threads()
+
+chatterbox_installed = importlib.util.find_spec('chatterbox') is not None
+model_pool = ChatterboxModelPool(
+    DEVICE,
+    memory_budget_mb=int(os.environ.get('CHATTERBOX_MEMORY_BUDGET_MB', '6144')),
+    allowed_models=ALLOWED_MODELS,
+    prepare=lambda model, model_type: cpu_profile.prepare(model, model_type, DEVICE),
+    on_load=lambda model_type, seconds: model_load_seconds.observe(seconds, model=model_type)
+)
 
 # Default voice reference audio (optional - can be provided per request)
 DEFAULT_VOICE_REF = os.environ.get('DEFAULT_VOICE_REF', None)
 
+# Voices to encode at startup, as "name=/path/voice.wav,name2=/path/other.wav"
+PREWARM_VOICES = os.environ.get('PREWARM_VOICES', '')
+
+# Speaker conditioning is encoded once per reference file and reused
+voice_cache = VoiceConditioningCache(max_entries=int(os.environ.get('VOICE_CACHE_SIZE', '8')))
+
+# Finished audio for repeated prompts is served without touching the model
+synthesis_cache = SynthesisCache(
+    memory_max_bytes=int(os.environ.get('TTS_CACHE_MEMORY_MB', '64')) * 1024 * 1024,
+    disk_dir=os.environ.get('TTS_CACHE_DIR') or None,
+    disk_max_bytes=int(os.environ.get('TTS_CACHE_DISK_MB', '512')) * 1024 * 1024
+)
+
+# Prompts share sentences (framing, closing lines), so audio is also cached per
+# segment and new prompts are stitched from cached + freshly generated segments
+SEGMENT_CACHE_MB = int(os.environ.get('TTS_SEGMENT_CACHE_MB', '64'))
+segment_cache = SynthesisCache(
+    memory_max_bytes=SEGMENT_CACHE_MB * 1024 * 1024,
+    disk_dir=os.path.join(os.environ['TTS_CACHE_DIR'], 'segments') if os.environ.get('TTS_CACHE_DIR') else None,
+    disk_max_bytes=int(os.environ.get('TTS_SEGMENT_CACHE_DISK_MB', '256')) * 1024 * 1024
+) if SEGMENT_CACHE_MB > 0 else None
+CROSSFADE_MS = int(os.environ.get('TTS_CROSSFADE_MS', '20'))
+
+# One generation (or model load) at a time: conditioning is swapped into shared models
+model_lock = threading.Lock()
+
+# Output encoding (wav, opus/ogg, mp3) runs outside the model lock
+DEFAULT_AUDIO_FORMAT = os.environ.get('TTS_DEFAULT_FORMAT', 'wav')
+DEFAULT_AUDIO_BITRATE = os.environ.get('TTS_DEFAULT_BITRATE') or None  # per-format default when unset
+audio_encoder = AudioEncoder(max_workers=int(os.environ.get('TTS_ENCODER_WORKERS', '2')))
+
+# Background synthesis of known texts (e.g. an interview's questions)
+prefetch_jobs = PrefetchJobStore(max_jobs=int(os.environ.get('TTS_PREFETCH_MAX_JOBS', '64')))
+PREFETCH_MAX_ITEMS = int(os.environ.get('TTS_PREFETCH_MAX_ITEMS', '50'))
+
+# Models and voices load in the background; see /health/ready
+startup = Startup()
+
 print(f"🎙️ Initializing Chatterbox TTS Service...")
 print(f"   Device: {DEVICE}")
-print(f"   Model Type: {MODEL_TYPE}")
-
-try:
-    if MODEL_TYPE == 'turbo':
-        from chatterbox.tts_turbo import ChatterboxTurboTTS
-        print(f"📥 Loading Chatterbox-Turbo model...")
-        chatterbox_model = ChatterboxTurboTTS.from_pretrained(device=DEVICE)
-        print(f"✅ Chatterbox-Turbo loaded successfully!")
-    elif MODEL_TYPE == 'multilingual':
-        from chatterbox.mtl_tts import ChatterboxMultilingualTTS
-        print(f"📥 Loading Chatterbox-Multilingual model...")
-        chatterbox_model = ChatterboxMultilingualTTS.from_pretrained(device=DEVICE)
-        print(f"✅ Chatterbox-Multilingual loaded successfully!")
-    else:  # standard
-        from chatterbox.tts import ChatterboxTTS
-        print(f"📥 Loading Chatterbox model...")
-        chatterbox_model = ChatterboxTTS.from_pretrained(device=DEVICE)
-        print(f"✅ Chatterbox loaded successfully!")
-except ImportError as e:
-    model_load_error = str(e)
-    print(f"⚠️ Chatterbox not installed: {e}")
+print(f"   Default Model: {MODEL_TYPE} (allowed: {', '.join(ALLOWED_MODELS)})")
+print(f"   CPU Profile: {cpu_profile.name} ({torch.get_num_threads()} threads)")
+if not chatterbox_installed:
+    print("⚠️ Chatterbox not installed")
     print("   To enable: pip install chatterbox-tts")
-except Exception as e:
-    model_load_error = str(e)
-    print(f"⚠️ Failed to load Chatterbox model: {e}")
 
 
 # ============================================
@@ -75,24 +199,546 @@ except Exception as e:
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
-    model_available = chatterbox_model is not None
-    watermarker = getattr(chatterbox_model, "watermarker", None)
-    watermarking_available = model_available and not isinstance(
-        watermarker,
-        NoOpWatermarker
-    )
+    """Health check endpoint (503 while draining, so load balancers stop routing here)"""
+    # "available" means installed and not known to fail; readiness is under "startup"
+    model_load_error = model_pool.last_error(MODEL_TYPE)
+    if not chatterbox_installed:
+        model_load_error = "chatterbox-tts is not installed"
+    model_available = model_load_error is None
+
+    loaded = model_pool.loaded_models()
+    watermarking_available = None  # unknown until a model is loaded
+    if loaded:
+        watermarking_available = all(
+            not isinstance(getattr(model, "watermarker", None), NoOpWatermarker)
+            for model in loaded.values()
+        )
+
+    status = "healthy" if model_available else "degraded"
+    if startup.loading:
+        status = "starting"
+    if draining.is_set():
+        status = "draining"
 
     return jsonify({
-        "status": "healthy" if model_available else "degraded",
+        "status": status,
         "chatterbox_available": model_available,
         "model_type": MODEL_TYPE if model_available else None,
         "configured_model_type": MODEL_TYPE,
         "device": DEVICE,
         "watermarking_available": watermarking_available,
         "model_load_error": model_load_error,
+        "models": model_pool.stats(),
+        "cpu_profile": cpu_profile.info(),
+        "synthesis_cache": synthesis_cache.stats(),
+        "segment_cache": segment_cache.stats() if segment_cache else None,
+        "synthesis_queue": synthesis_queue.stats(),
+        "prefetch_jobs": prefetch_jobs.stats(),
+        "output_formats": list(OUTPUT_FORMATS),
+        "default_format": DEFAULT_AUDIO_FORMAT,
+        "startup": startup.status(),
         "service": "Chatterbox TTS Service"
+    }), 503 if draining.is_set() else 200
+
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests, whether or not models are loaded"""
+    return jsonify({
+        "status": "alive",
+        "uptimeSeconds": startup.status()["uptimeSeconds"],
+        "service": "Chatterbox TTS Service"
+    })
+
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the default model is loaded and warmed up; 503 while loading, failed or draining"""
+    ready = startup.ready and not draining.is_set()
+    return jsonify({
+        **startup.status(),
+        "status": "draining" if draining.is_set() else startup.state,
+        "ready": ready,
+        "model_type": MODEL_TYPE,
+        "service": "Chatterbox TTS Service"
+    }), 200 if ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# Models that aren't resident load on their own thread, so a cold load (e.g.
+# multilingual for a non-English request) doesn't stall the scheduler: groups
+# for resident models keep running, and the waiting group runs once it's loaded
+model_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-load')
+model_loads = {}  # model type -> Future of its background load
+model_loads_lock = threading.Lock()
+
+
+def model_ready(settings):
+    """Scheduler `ready` check: is the group's model resident? Starts loading it if not."""
+    model_type = settings[0]
+    if model_pool.is_loaded(model_type):
+        return True
+    with model_loads_lock:
+        load = model_loads.get(model_type)
+        if load is not None and load.done() and load.exception() is None:
+            load = None  # loaded earlier, since unloaded to make room
+        if load is None:
+            # Runs without model_lock: a model it unloads to make room stays alive
+            # until the generation using it finishes
+            load = model_loader.submit(model_pool.get, model_type)
+            load.add_done_callback(lambda _: synthesis_queue.wake())
+            model_loads[model_type] = load
+    # A failed load lets the group run, so its jobs get the error
+    return load.done()
+
+
+def run_generation_batch(settings, texts):
+    """
+    Generate a group of texts that share a model, voice and language.
+
+    Chatterbox has no batched generate, so the texts run back to back - but
+    the speaker conditioning is swapped in once for the whole group.
+    Returns a (waveform, sample_rate) tuple per text.
+    """
+    model_type, audio_prompt_path, language = settings
+    results = []
+    # Queued work (e.g. prefetch jobs) waits for the startup load instead of racing it
+    startup.wait()
+    with model_loads_lock:
+        load = model_loads.get(model_type)
+        if load is not None and load.done() and load.exception() is not None:
+            # Fail this group with the background load's error; the next request retries
+            model_loads.pop(model_type)
+            raise load.exception()
+    with model_lock:
+        entry = model_pool.get(model_type)
+        model = entry["model"]
+        if audio_prompt_path:
+            # Reuse the cached speaker conditioning instead of re-encoding the clip
+            model.conds = voice_cache.get(model, model_type, audio_prompt_path)
+        elif entry["builtinConds"] is not None:
+            model.conds = entry["builtinConds"]
+
+        for text in texts:
+            try:
+                with cpu_profile.inference_context():
+                    if model_type == 'multilingual':
+                        # Multilingual supports language_id
+                        results.append((model.generate(text, language_id=language), model.sr))
+                    else:
+                        results.append((model.generate(text), model.sr))
+            except Exception as e:
+                results.append(e)
+    if len(texts) > 1:
+        print(f"📦 Generated batch of {len(texts)} with {model_type} for voice {audio_prompt_path or 'builtin'}")
+    return results
+
+
+def observe_batch(size, queue_waits, seconds):
+    """Scheduler callback: export queue wait and model time"""
+    batch_size.observe(size)
+    batch_seconds.observe(seconds)
+    for wait in queue_waits:
+        queue_wait_seconds.observe(wait)
+
+
+# Concurrent requests are queued and grouped by model/voice/language
+synthesis_queue = SynthesisQueue(
+    run_generation_batch,
+    max_depth=int(os.environ.get('TTS_QUEUE_MAX_DEPTH', '32')),
+    max_batch_size=int(os.environ.get('TTS_MAX_BATCH_SIZE', '4')),
+    window_ms=int(os.environ.get('TTS_BATCH_WINDOW_MS', '20')),
+    on_batch=observe_batch,
+    ready=model_ready
+)
+
+
+# ============================================
+# SERVING (graceful drain)
+# ============================================
+
+# Set when the server starts shutting down (see gunicorn.conf.py)
+draining = threading.Event()
+
+
+def begin_drain():
+    """Stop taking new work and drop queued prefetch; live requests already queued still finish."""
+    if not draining.is_set():
+        draining.set()
+        cancelled = synthesis_queue.cancel_pending(PRIORITY_PREFETCH)
+        print(f"🛑 Draining: rejecting new requests, cancelled {cancelled} queued prefetch segments")
+
+
+def drain(timeout=30):
+    """Wait for queued and running synthesis to finish before the process exits."""
+    begin_drain()
+    if not synthesis_queue.wait_idle(timeout):
+        print(f"⚠️ Drain timed out after {timeout}s with synthesis still queued")
+        return False
+    print("✅ Drained")
+    return True
+
+
+@app.before_request
+def reject_while_draining():
+    if draining.is_set() and request.path not in ('/health', '/health/live', '/health/ready', '/metrics'):
+        response = jsonify({
+            "success": False,
+            "error": "TTS service is shutting down, please retry",
+            "retryAfter": 1
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+
+class SynthesisRequestError(Exception):
+    """Invalid synthesis options, reported to the client as a JSON error."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_synthesis_options(data, stream=False):
+    """Resolve voice, language, format and bitrate from a request body."""
+    audio_prompt_path = data.get('audio_prompt_path', DEFAULT_VOICE_REF)
+    language = data.get('language', 'en')
+
+    model_type = data.get('model')
+    if not model_type:
+        # Non-English text needs the multilingual model unless the request says otherwise
+        english = str(language or 'en').lower().startswith('en')
+        model_type = 'multilingual' if not english and 'multilingual' in ALLOWED_MODELS else MODEL_TYPE
+    if model_type not in ALLOWED_MODELS:
+        raise SynthesisRequestError(f"Unsupported model '{model_type}'. Allowed: {', '.join(ALLOWED_MODELS)}")
+
+    audio_format = 'wav' if stream else str(data.get('format') or DEFAULT_AUDIO_FORMAT).lower()
+    bitrate = data.get('bitrate') or DEFAULT_AUDIO_BITRATE
+
+    if audio_format not in OUTPUT_FORMATS:
+        raise SynthesisRequestError(f"Unsupported format '{audio_format}'. Supported: {', '.join(OUTPUT_FORMATS)}")
+    if bitrate and not str(bitrate).rstrip('kK').isdigit():
+        raise SynthesisRequestError(f"Invalid bitrate '{bitrate}'. Use e.g. '32k' or '64000'")
+    if audio_format == 'wav':
+        bitrate = None  # uncompressed - bitrate doesn't apply
+
+    if data.get('voice'):
+        audio_prompt_path = voice_cache.resolve(data['voice'])
+        if not audio_prompt_path:
+            raise SynthesisRequestError(f"Unknown voice '{data['voice']}'. Register it via POST /tts/voices")
+
+    mimetype, extension, _ = OUTPUT_FORMATS[audio_format]
+    return {
+        "model": model_type,
+        "audio_prompt_path": audio_prompt_path,
+        "language": language,
+        "format": audio_format,
+        "bitrate": bitrate,
+        "mimetype": mimetype,
+        "extension": extension,
+    }
+
+
+def synthesis_settings(options):
+    """Queue grouping key: jobs with equal settings share one conditioning setup."""
+    language = options['language'] if options['model'] == 'multilingual' else None
+    return (options['model'], options['audio_prompt_path'], language)
+
+
+def synthesis_cache_key(text, options):
+    return SynthesisCache.key(
+        text,
+        voice_identity(options['audio_prompt_path']),
+        options['language'] if options['model'] == 'multilingual' else None,
+        options['model'],
+        options['format'],
+        options['bitrate']
+    )
+
+
+def segment_cache_key(segment, options):
+    """Segments are cached as WAV regardless of the requested output format."""
+    return SynthesisCache.key(
+        segment,
+        voice_identity(options['audio_prompt_path']),
+        options['language'] if options['model'] == 'multilingual' else None,
+        options['model']
+    )
+
+
+def split_segments(text):
+    """Sentence/phrase segments to synthesize and cache separately (whole text when disabled)."""
+    text = normalize_for_speech(text)
+    if segment_cache is None:
+        return [text] if text else []
+    return split_sentences(text)
+
+
+# cache key -> futures for work currently in progress, so a live request for
+# text that is already queued (e.g. by a prefetch job) joins it instead of
+# generating it again
+inflight_segments = {}  # segment key -> waveform future
+inflight_synthesis = {}  # full cache key -> (segment futures, audio future)
+inflight_lock = threading.Lock()
+
+
+def queue_segments(segments, options, priority=PRIORITY_LIVE, timer=None):
+    """
+    Futures of (waveform, sample rate) for each segment: from the segment
+    cache, joined to an in-flight generation, or newly queued. Segments that
+    need generating are queued all-or-nothing, so a QueueFullError leaves no
+    work behind for a rejected request (and a stream is never cut short).
+    Returns (futures, number of segments reused from the segment cache).
+    """
+    keys = [segment_cache_key(segment, options) for segment in segments]
+    futures = [None] * len(segments)
+    reused = 0
+    if segment_cache is not None:
+        with timed(timer, 'cache'):
+            for index, key in enumerate(keys):
+                cached = segment_cache.get(key)
+                if cached is not None:
+                    futures[index] = Future()
+                    futures[index].set_result(decode_wav16(cached))
+                    reused += 1
+
+    with inflight_lock:
+        missing = {}  # key -> indexes; a sentence repeated within the prompt is generated once
+        for index, key in enumerate(keys):
+            if futures[index] is not None:
+                continue
+            future = inflight_segments.get(key)
+            if future is not None:
+                if priority < PRIORITY_PREFETCH:
+                    synthesis_queue.promote(future, priority)
+                futures[index] = future
+            else:
+                missing.setdefault(key, []).append(index)
+        queued = synthesis_queue.submit_many_async(
+            [segments[indexes[0]] for indexes in missing.values()], synthesis_settings(options), priority, timer
+        )
+        for key, future in zip(missing, queued):
+            inflight_segments[key] = future
+            for index in missing[key]:
+                futures[index] = future
+
+    def store(key, done):
+        with inflight_lock:
+            inflight_segments.pop(key, None)
+        if segment_cache is not None and not done.cancelled() and done.exception() is None:
+            wav, sample_rate = done.result()
+            pcm = wav_to_pcm16(wav)
+            segment_cache.put(key, wav_header(sample_rate, len(pcm)) + pcm)
+
+    for key, future in zip(missing, queued):
+        future.add_done_callback(lambda done, key=key: store(key, done))
+    return futures, reused
+
+
+def synthesize_async(text, options, priority=PRIORITY_LIVE, timer=None):
+    """
+    Synthesize and encode `text`, deduplicating against the cache and
+    in-flight work. Only segments missing from the segment cache are
+    generated; the rest are reused and crossfaded together.
+    Returns (Future resolving to encoded audio bytes,
+    cache status: 'HIT', 'INFLIGHT' or 'MISS').
+    Stage times go to `timer`, if given (complete once the future resolves).
+    """
+    cache_key = synthesis_cache_key(text, options)
+    with timed(timer, 'cache'):
+        cached_audio = synthesis_cache.get(cache_key)
+    if cached_audio is not None:
+        done = Future()
+        done.set_result(cached_audio)
+        return done, 'HIT'
+
+    with inflight_lock:
+        inflight = inflight_synthesis.get(cache_key)
+    if inflight is not None:
+        segment_futures, audio_future = inflight
+        if priority < PRIORITY_PREFETCH:
+            for future in segment_futures:
+                synthesis_queue.promote(future, priority)
+        return audio_future, 'INFLIGHT'
+
+    segments = split_segments(text)
+    if not segments:
+        raise SynthesisRequestError("'text' is empty")
+
+    # Raises QueueFullError (with nothing queued) if the segments don't fit
+    segment_futures, reused = queue_segments(segments, options, priority, timer)
+    if len(segments) > 1:
+        print(f"🧩 {len(segments)} segments, {reused} from cache")
+
+    audio_future = Future()
+    with inflight_lock:
+        inflight_synthesis[cache_key] = (segment_futures, audio_future)
+
+    def finish(result=None, error=None):
+        with inflight_lock:
+            inflight_synthesis.pop(cache_key, None)
+        if error is not None:
+            audio_future.set_exception(error)
+        else:
+            synthesis_cache.put(cache_key, result)
+            audio_future.set_result(result)
+
+    encode_started = []
+
+    def encoded(future):
+        if timer is not None:
+            timer.add('encode', time.perf_counter() - encode_started[0])
+        if future.exception() is not None:
+            finish(error=future.exception())
+        else:
+            finish(result=future.result())
+
+    remaining = [len(segment_futures)]
+    remaining_lock = threading.Lock()
+
+    def segment_done(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        for future in segment_futures:
+            if future.cancelled() or future.exception() is not None:
+                finish(error=future.exception() if not future.cancelled() else RuntimeError("Synthesis cancelled"))
+                return
+        waves = [future.result() for future in segment_futures]
+        sample_rate = waves[0][1]
+        with timed(timer, 'stitch'):
+            wav = crossfade_concat([w for w, _ in waves], sample_rate, CROSSFADE_MS)
+        # Encode on the encoder pool - the model lock is already released, so
+        # the next job can start generating while this one is encoded
+        encode_started.append(time.perf_counter())
+        audio_encoder.submit(wav, sample_rate, options['format'], options['bitrate']).add_done_callback(encoded)
+
+    for future in segment_futures:
+        future.add_done_callback(segment_done)
+    return audio_future, 'MISS'
+
+
+def queue_full_response(retry_after):
+    response = jsonify({
+        "success": False,
+        "error": "TTS service is busy, please retry shortly",
+        "retryAfter": retry_after
     })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
+def starting_response():
+    response = jsonify({
+        "success": False,
+        "error": "TTS service is starting up, please retry shortly",
+        "retryAfter": 5
+    })
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+
+def warmup_generate(model_type):
+    """One dummy generation, so one-off allocations happen before real requests"""
+    with model_lock:
+        entry = model_pool.get(model_type)
+        if (entry["prepared"] or {}).get("warmupSeconds") is not None:
+            return  # the CPU profile already warmed it up on load
+        model = entry["model"]
+        with cpu_profile.inference_context():
+            if model_type == 'multilingual':
+                model.generate(cpu_profile.warmup_text, language_id='en')
+            else:
+                model.generate(cpu_profile.warmup_text)
+
+
+def load_models():
+    """
+    Startup work (on a background thread): load and warm the default model,
+    load CHATTERBOX_WARMUP_MODELS, then encode the pre-warmed voices. Other
+    models still load on their first request.
+    """
+    if not chatterbox_installed:
+        raise RuntimeError("chatterbox-tts is not installed")
+    with startup.step(f"load:{MODEL_TYPE}"):
+        with model_lock:
+            model_pool.get(MODEL_TYPE)
+    with startup.step(f"warmup:{MODEL_TYPE}"):
+        warmup_generate(MODEL_TYPE)
+    for model_type in WARMUP_MODELS:
+        if model_type == MODEL_TYPE:
+            continue
+        with startup.step(f"load:{model_type}"):
+            try:
+                with model_lock:
+                    model_pool.get(model_type)
+            except ModelLoadError as e:
+                print(f"⚠️ Failed to warm up Chatterbox {model_type}: {e}")
+    with startup.step("voices"):
+        prewarm_voices()
+
+
+def prewarm_voices():
+    """
+    Register PREWARM_VOICES (plus DEFAULT_VOICE_REF) and encode them for
+    every model already loaded; other models encode them on first use.
+    """
+    voices = {}
+    if DEFAULT_VOICE_REF:
+        voices['default'] = DEFAULT_VOICE_REF
+    for item in PREWARM_VOICES.split(','):
+        if '=' in item:
+            name, path = item.split('=', 1)
+            voices[name.strip()] = path.strip()
+
+    for name, path in voices.items():
+        try:
+            voice_cache.register(name, path)
+            with model_lock:
+                for model_type, model in model_pool.loaded_models().items():
+                    voice_cache.get(model, model_type, path)
+            print(f"✅ Voice '{name}' ready")
+        except Exception as e:
+            print(f"⚠️ Failed to pre-warm voice '{name}' ({path}): {e}")
+
+
+def stream_sentences(futures, cache_key=None, timer=None, started=None):
+    """
+    Yield PCM frames for already-queued sentences (see queue_segments), in
+    order, as each one finishes; later sentences keep generating while
+    earlier ones are sent. The WAV header goes out with the first frame,
+    once the model (and so its sample rate) is known. A completed stream is
+    stored in the synthesis cache as a regular WAV file.
+    `started` (perf_counter) is the request start, for time-to-first-frame.
+    """
+    frames = []
+    total_bytes = 0
+    sample_rate = None
+    for index, future in enumerate(futures, 1):
+        try:
+            wav, sample_rate = future.result()
+        except Exception as e:
+            # Headers are already sent - all we can do is end the stream early
+            print(f"❌ TTS streaming error on sentence {index}/{len(futures)}: {e}")
+            return
+        with timed(timer, 'encode'):
+            frame = wav_to_pcm16(wav)
+        frames.append(frame)
+        total_bytes += len(frame)
+        print(f"🔊 Streamed sentence {index}/{len(futures)} ({len(frame)} bytes)")
+        if index == 1 and started is not None:
+            first_chunk_seconds.observe(time.perf_counter() - started)
+        yield wav_header(sample_rate) + frame if index == 1 else frame
+    
+    print(f"✅ Audio stream complete ({total_bytes} bytes)")
+    if cache_key:
+        synthesis_cache.put(cache_key, wav_header(sample_rate, total_bytes) + b''.join(frames))
 
 
 @app.route('/tts/synthesize', methods=['POST'])
@@ -104,19 +750,35 @@ def synthesize_speech():
     {
         "text": "Text to synthesize",
         "audio_prompt_path": "path/to/reference/voice.wav" (optional),
-        "language": "en" (optional, for multilingual model)
+        "voice": "interviewer" (optional, a name registered via POST /tts/voices),
+        "language": "en" (optional, for multilingual model),
+        "model": "turbo" (optional: turbo, standard or multilingual; loaded on first use),
+        "format": "wav" (optional: wav, opus, ogg or mp3),
+        "bitrate": "32k" (optional, for opus/ogg and mp3),
+        "stream": false (optional)
     }
     
-    Returns: MP3 audio stream
+    Returns: audio in the requested format (WAV by default)
+    
+    With "stream": true the text is split into sentences and the response is
+    sent chunked: a WAV header followed by 16-bit PCM frames as each sentence
+    finishes generating, so playback can start after the first sentence.
+    Streaming responses are always WAV.
+    
+    Returns 429 with a Retry-After header when the synthesis queue is full.
     """
-    if not chatterbox_model:
+    if not chatterbox_installed:
         return jsonify({
             "success": False,
             "error": "Chatterbox TTS not available"
         }), 503
+    if startup.loading:
+        return starting_response()
 
+    timer = g.timer
     try:
-        data = request.get_json()
+        with timer.stage('parse'):
+            data = request.get_json()
         
         if not data or 'text' not in data:
             return jsonify({
@@ -125,50 +787,212 @@ def synthesize_speech():
             }), 400
 
         text = data['text']
-        audio_prompt_path = data.get('audio_prompt_path', DEFAULT_VOICE_REF)
-        language = data.get('language', 'en')
+        with timer.stage('parse'):
+            options = parse_synthesis_options(data, stream=bool(data.get('stream')))
+            cache_key = synthesis_cache_key(text, options)
 
-        print(f"🔊 Synthesizing: {text[:50]}...")
-        
-        # Generate audio
-        if MODEL_TYPE == 'turbo' and audio_prompt_path:
-            # Turbo requires a reference voice
-            wav = chatterbox_model.generate(text, audio_prompt_path=audio_prompt_path)
-        elif MODEL_TYPE == 'multilingual':
-            # Multilingual supports language_id
-            wav = chatterbox_model.generate(
-                text, 
-                language_id=language,
-                audio_prompt_path=audio_prompt_path if audio_prompt_path else None
+        if data.get('stream'):
+            # Repeated prompts (greetings, transitions, common questions) come from cache
+            with timer.stage('cache'):
+                cached_audio = synthesis_cache.get(cache_key)
+            if cached_audio is not None:
+                print(f"⚡ Cache hit ({len(cached_audio)} bytes): {text[:50]}...")
+                cache_results.inc(status='HIT')
+                return audio_response(cached_audio, options, cache_status='HIT')
+
+            sentences = split_sentences(normalize_for_speech(text))
+            if not sentences:
+                return jsonify({
+                    "success": False,
+                    "error": "'text' is empty"
+                }), 400
+            # Once the stream has started we can no longer send a 429, so every
+            # sentence is queued up front (all or none; QueueFullError -> 429)
+            futures, reused = queue_segments(sentences, options, timer=timer)
+            
+            print(f"🔊 Streaming {len(sentences)} sentences ({reused} from cache): {text[:50]}...")
+            cache_results.inc(status='MISS')
+            return Response(
+                stream_with_context(stream_sentences(futures, cache_key, timer, g.started)),
+                mimetype='audio/wav',
+                headers={'X-Sentence-Count': str(len(sentences)), 'X-Cache': 'MISS'}
             )
+
+        # Cached and already-prefetching texts are picked up by synthesize_async
+        future, cache_status = synthesize_async(text, options, timer=timer)
+        cache_results.inc(status=cache_status)
+        if cache_status == 'HIT':
+            audio = future.result()
+            print(f"⚡ Cache hit ({len(audio)} bytes): {text[:50]}...")
+            return audio_response(audio, options, cache_status)
+
+        print(f"🔊 Synthesizing{' (joined prefetch)' if cache_status == 'INFLIGHT' else ''}: {text[:50]}...")
+        if cache_status == 'INFLIGHT':
+            # Another request's generation; its stages are recorded there
+            with timer.stage('inflight_wait'):
+                audio = future.result()
         else:
-            # Standard model
-            if audio_prompt_path:
-                wav = chatterbox_model.generate(text, audio_prompt_path=audio_prompt_path)
-            else:
-                wav = chatterbox_model.generate(text)
+            audio = future.result()
+        print(f"✅ Audio generated successfully ({len(audio)} bytes {options['format']})")
+        return audio_response(audio, options, cache_status)
 
-        # Convert to bytes
-        buffer = io.BytesIO()
-        ta.save(buffer, wav, chatterbox_model.sr, format='wav')
-        buffer.seek(0)
+    except SynthesisRequestError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), e.status_code
+    except QueueFullError as e:
+        print(f"⚠️ Synthesis queue full, rejecting request (retry after {e.retry_after}s)")
+        queue_rejections.inc()
+        return queue_full_response(e.retry_after)
+    except ModelLoadError as e:
+        print(f"❌ {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503
+    except AudioEncodeError as e:
+        print(f"❌ Audio encoding error: {e}")
+        return jsonify({
+            "success": False,
+            "error": f"Failed to encode audio: {e}"
+        }), 500
+    except Exception as e:
+        print(f"❌ TTS synthesis error: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
 
-        print(f"✅ Audio generated successfully ({buffer.getbuffer().nbytes} bytes)")
 
-        return send_file(
-            buffer,
-            mimetype='audio/wav',
-            as_attachment=False,
-            download_name='speech.wav'
-        )
+def audio_response(audio, options, cache_status):
+    response = send_file(
+        io.BytesIO(audio),
+        mimetype=options['mimetype'],
+        as_attachment=False,
+        download_name=f"speech.{options['extension']}"
+    )
+    response.headers['X-Cache'] = cache_status
+    return response
+
+
+# ============================================
+# PREFETCH JOBS
+# ============================================
+
+@app.route('/tts/jobs', methods=['POST'])
+def create_prefetch_job():
+    """
+    Synthesize a list of texts in the background
+    
+    Request body (JSON):
+    {
+        "texts": ["First question...", "Second question..."],
+        "voice" / "audio_prompt_path" / "language" / "format" / "bitrate": as for /tts/synthesize,
+        "priority": "prefetch" (default) or "live"
+    }
+    
+    Returns 202 with a job id. Poll GET /tts/jobs/<id> or fetch items from
+    GET /tts/jobs/<id>/items/<index>. Prefetch work only runs when no live
+    request is waiting, and finished items are cached, so a later
+    /tts/synthesize call for the same text is served immediately.
+    """
+    if not chatterbox_installed:
+        return jsonify({
+            "success": False,
+            "error": "Chatterbox TTS not available"
+        }), 503
+
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify({
+            "success": False,
+            "error": "'texts' must be a non-empty list of strings"
+        }), 400
+    if len(texts) > PREFETCH_MAX_ITEMS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many texts. Maximum {PREFETCH_MAX_ITEMS} per job."
+        }), 400
+
+    priority = PRIORITY_LIVE if data.get('priority') == 'live' else PRIORITY_PREFETCH
+
+    try:
+        options = parse_synthesis_options(data)
+    except SynthesisRequestError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), e.status_code
+
+    futures = []
+    for text in texts:
+        try:
+            future, _ = synthesize_async(text, options, priority)
+            futures.append(future)
+        except QueueFullError as e:
+            if not futures:
+                return queue_full_response(e.retry_after)
+            failed = Future()
+            failed.set_exception(e)
+            futures.append(failed)
 
+    job = prefetch_jobs.add(PrefetchJob(texts, futures, options))
+    print(f"📋 Prefetch job {job.id}: {len(texts)} texts")
+    response = jsonify({"success": True, **job.to_dict()})
+    response.headers['Location'] = f'/tts/jobs/{job.id}'
+    return response, 202
+
+
+@app.route('/tts/jobs/<job_id>', methods=['GET'])
+def get_prefetch_job(job_id):
+    """Status of a prefetch job and each of its items"""
+    job = prefetch_jobs.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+
+@app.route('/tts/jobs/<job_id>/items/<int:index>', methods=['GET'])
+def get_prefetch_item(job_id, index):
+    """
+    Audio for one item of a prefetch job
+    
+    Query: ?wait=10 blocks up to that many seconds (max 60) for the item.
+    Returns the audio once complete, 202 while still pending, 500 if it failed.
+    """
+    job = prefetch_jobs.get(job_id)
+    if job is None or not 0 <= index < len(job.texts):
+        return jsonify({
+            "success": False,
+            "error": "Job or item not found"
+        }), 404
+
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), 60)
+    except ValueError:
+        wait = 0
+
+    try:
+        audio = job.wait_item(index, timeout=wait)
     except Exception as e:
-        print(f"❌ TTS synthesis error: {e}")
         return jsonify({
             "success": False,
+            "status": "failed",
             "error": str(e)
         }), 500
 
+    if audio is None:
+        return jsonify({
+            "success": True,
+            "status": "pending"
+        }), 202
+    return audio_response(audio, job.settings, cache_status='PREFETCH')
+
 
 @app.route('/tts/voices', methods=['GET'])
 def list_voices():
@@ -180,21 +1004,87 @@ def list_voices():
         "success": True,
         "message": "Chatterbox uses voice cloning from reference audio",
         "default_voice": DEFAULT_VOICE_REF,
-        "note": "Provide 'audio_prompt_path' in synthesis request to use custom voice"
+        "note": "Provide 'audio_prompt_path' in synthesis request to use custom voice",
+        "voices": voice_cache.voices(),
+        "conditioning_cache": voice_cache.stats()
     })
 
 
+@app.route('/tts/voices', methods=['POST'])
+def register_voice():
+    """
+    Register a named voice and pre-compute its speaker conditioning
+    
+    Request body (JSON):
+    {
+        "name": "interviewer",
+        "audio_prompt_path": "/path/to/reference/voice.wav",
+        "model": "turbo" (optional, model to encode the voice for; default CHATTERBOX_MODEL)
+    }
+    
+    Later synthesis requests can pass "voice": "interviewer" and skip
+    re-encoding the reference clip.
+    """
+    if not chatterbox_installed:
+        return jsonify({
+            "success": False,
+            "error": "Chatterbox TTS not available"
+        }), 503
+
+    data = request.get_json(silent=True) or {}
+    name = data.get('name')
+    path = data.get('audio_prompt_path')
+    model_type = data.get('model') or MODEL_TYPE
+    if not name or not path:
+        return jsonify({
+            "success": False,
+            "error": "Both 'name' and 'audio_prompt_path' are required"
+        }), 400
+
+    try:
+        voice_cache.register(name, path)
+        with model_lock:
+            voice_cache.get(model_pool.get(model_type)["model"], model_type, path)
+    except FileNotFoundError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except ModelLoadError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503
+    except Exception as e:
+        print(f"❌ Voice registration error: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+    print(f"✅ Voice '{name}' registered")
+    return jsonify({
+        "success": True,
+        "voice": {"name": name, "audio_prompt_path": path}
+    }), 201
+
+
 # ============================================
 # RUN SERVER
 # ============================================
 
+# The port is served while this runs; see /health/ready
+startup.run(load_models)
+
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("🎙️ Chatterbox TTS Service for AI Interview")
     print("="*60)
-    print(f"Model: {'✅ ' + MODEL_TYPE if chatterbox_model else '❌ Not loaded'}")
+    print(f"Model: {'⏳ ' + MODEL_TYPE + ' loading in background (see /health/ready)' if chatterbox_installed else '❌ Not installed'}")
     print(f"Device: {DEVICE}")
-    print("\n📡 Starting Flask server on http://localhost:5002")
+    print("\n📡 Starting Flask development server on http://localhost:5002")
+    print("   For production: gunicorn -c gunicorn.conf.py app:app")
     print("="*60 + "\n")
     
     # Run on port 5002 (5001 is used by voice-service for Whisper)
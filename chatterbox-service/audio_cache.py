@@ -0,0 +1,166 @@
+"""
+Synthesized-audio cache for the Chatterbox TTS Service
+
+Interview greetings, transitions and common questions repeat constantly
+across candidates. Finished audio is cached by a hash of the normalized text
+plus everything else that changes the output (voice reference, language,
+model, format), in a byte-bounded memory LRU backed by an optional
+size-bounded directory on disk. Hits are served without touching the model.
+"""
+
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """Canonical form used for cache keys: NFC, collapsed whitespace."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def voice_identity(audio_prompt_path):
+    """Identify a voice reference by path + mtime + size, so edits invalidate entries."""
+    if not audio_prompt_path:
+        return 'builtin'
+    try:
+        stat = os.stat(audio_prompt_path)
+        return f'{os.path.realpath(audio_prompt_path)}:{stat.st_mtime_ns}:{stat.st_size}'
+    except OSError:
+        return audio_prompt_path
+
+
+class SynthesisCache:
+    # The disk tier's size is tracked as files are written; once over the limit
+    # the directory is rescanned and trimmed to this fraction of it
+    DISK_EVICT_TO = 0.9
+
+    def __init__(self, memory_max_bytes=64 * 1024 * 1024, disk_dir=None, disk_max_bytes=512 * 1024 * 1024):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._evict_disk()
+
+    @staticmethod
+    def key(text, *settings):
+        digest = hashlib.sha256(normalize_text(text).encode())
+        for setting in settings:
+            digest.update(b'\0' + str(setting or '').encode())
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f'{key}.bin')
+
+    def get(self, key):
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+
+        if audio is None and self.disk_dir:
+            path = self._disk_path(key)
+            try:
+                with open(path, 'rb') as f:
+                    audio = f.read()
+                os.utime(path)  # keep recently used files away from eviction
+                self._put_memory(key, audio)
+            except OSError:
+                audio = None
+
+        with self._lock:
+            if audio is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.bytes_served += len(audio)
+        return audio
+
+    def put(self, key, audio):
+        self._put_memory(key, audio)
+        if self.disk_dir:
+            self._put_disk(key, audio)
+
+    def _put_memory(self, key, audio):
+        if len(audio) > self.memory_max_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = audio
+            self._memory_bytes += len(audio)
+            while self._memory_bytes > self.memory_max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _put_disk(self, key, audio):
+        path = self._disk_path(key)
+        try:
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+        try:
+            with open(f'{path}.tmp', 'wb') as f:
+                f.write(audio)
+            os.replace(f'{path}.tmp', path)
+        except OSError as e:
+            print(f"⚠️ Failed to write audio cache entry: {e}")
+            return
+
+        with self._disk_lock:
+            self._disk_bytes += len(audio) - previous
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Rescan the directory and, if over the limit, drop least recently used files."""
+        with self._disk_lock:
+            files = []
+            for name in os.listdir(self.disk_dir):
+                if not name.endswith('.bin'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in files)
+            if total > self.disk_max_bytes:
+                for _, size, name in sorted(files):
+                    if total <= self.disk_max_bytes * self.DISK_EVICT_TO:
+                        break
+                    try:
+                        os.remove(os.path.join(self.disk_dir, name))
+                        total -= size
+                    except OSError:
+                        pass
+            self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+                "bytesServed": self.bytes_served,
+                "memoryEntries": len(self._memory),
+                "memoryBytes": self._memory_bytes,
+                "memoryMaxBytes": self.memory_max_bytes,
+                "diskDir": self.disk_dir,
+                "diskBytes": self._disk_bytes if self.disk_dir else None,
+                "diskMaxBytes": self.disk_max_bytes if self.disk_dir else None,
+            }
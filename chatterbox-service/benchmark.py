@@ -0,0 +1,360 @@
+"""
+Latency and throughput benchmark for the Chatterbox TTS Service
+
+Drives `/tts/synthesize` (or the model directly) with a fixed corpus of
+interview prompts in three length buckets, at several concurrency levels,
+and reports time-to-first-byte, total latency, real-time factor, peak RSS
+and throughput. Results are printed as a table and optionally written as
+JSON so runs can be diffed between releases.
+
+Modes:
+    http   - a running service at --url
+    app    - the Flask app in this process (queue, caches, encoding included)
+    model  - Chatterbox `generate` only
+
+`--stub` swaps Chatterbox for a stub model that generates a tone at a fixed
+real-time factor, so the app/model modes run offline without weights.
+
+Usage:
+    python benchmark.py --mode app --stub --concurrency 1 2 4 --output bench.json
+    python benchmark.py --mode http --url http://localhost:5002 --stream --service-pid 1234
+    python benchmark.py --mode model --model turbo --lengths short medium
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import struct
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+CORPUS = {
+    "short": [
+        "Great, thank you for that answer.",
+        "Let's move on to the next question.",
+        "Can you tell me about yourself?",
+        "That's a good point. Go on.",
+    ],
+    "medium": [
+        "Tell me about a time you disagreed with a teammate about a technical decision, "
+        "and how the two of you resolved it.",
+        "Walk me through a project on your resume that you're particularly proud of, "
+        "and explain what your role was.",
+        "How do you prioritize your work when several urgent requests arrive at the same time "
+        "from different stakeholders?",
+        "Describe a production incident you were involved in. What went wrong, and what did "
+        "the team change afterwards?",
+    ],
+    "long": [
+        "Let's talk about system design. Imagine you are building the backend for a ride sharing "
+        "application that needs to match riders with nearby drivers in real time. Walk me through "
+        "the main components you would build, how they would communicate, and how you would keep "
+        "latency low during peak hours. Feel free to mention any trade-offs you would make.",
+        "Thank you for walking me through that. For the next question, I'd like to focus on "
+        "collaboration. Think about a situation where a project deadline was at risk because of "
+        "work another team owned. How did you find out, what did you do about it, and looking "
+        "back, is there anything you would handle differently today?",
+        "Here is a coding scenario. You are given a stream of log lines from many servers, and you "
+        "need to report the ten most frequent error messages over the last hour. Explain the data "
+        "structures you would use, how memory grows with the number of distinct messages, and what "
+        "you would change if the stream no longer fit on a single machine.",
+        "We're almost at the end of the interview. Before we wrap up, I'd like to hear what you are "
+        "looking for in your next role. What kind of team do you work best in, what would you like "
+        "to learn over the next couple of years, and what questions do you have for me about the "
+        "position or the company?",
+    ],
+}
+
+STUB_SAMPLE_RATE = 24000
+
+
+class StubChatterboxModel:
+    """
+    Stand-in for a Chatterbox model: ~65 ms of audio per character, produced
+    after sleeping `rtf` times the audio duration.
+    """
+
+    sr = STUB_SAMPLE_RATE
+
+    def __init__(self, rtf=0.3):
+        self.rtf = rtf
+        self.conds = object()
+        self.watermarker = None
+
+    def prepare_conditionals(self, path, exaggeration=0.5):
+        self.conds = object()
+
+    def generate(self, text, language_id=None, **kwargs):
+        import torch
+        duration = max(len(text) * 0.065, 0.3)
+        time.sleep(duration * self.rtf)
+        t = torch.arange(int(duration * self.sr)) / self.sr
+        return (0.2 * torch.sin(2 * np.pi * 220 * t)).unsqueeze(0)
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident memory of this process, or of `pid` (Linux /proc) when given."""
+    if pid:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def wav_duration(body, sample_rate=None):
+    """Seconds of 16-bit mono audio in a WAV body (header sizes may be open-ended)."""
+    if len(body) < 44 or body[:4] != b'RIFF':
+        return None
+    sample_rate = sample_rate or struct.unpack_from('<I', body, 24)[0]
+    return (len(body) - 44) / 2 / sample_rate
+
+
+# ============================================
+# TARGETS
+# ============================================
+
+class HttpTarget:
+    def __init__(self, url, stream, audio_format):
+        self.url = url.rstrip('/')
+        self.stream = stream
+        self.audio_format = audio_format
+
+    def synthesize(self, text):
+        payload = {"text": text, "stream": self.stream, "format": self.audio_format}
+        request = urllib.request.Request(
+            f"{self.url}/tts/synthesize",
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method='POST'
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=600) as response:
+            first = response.read(1)
+            ttfb = time.perf_counter() - start
+            body = first + response.read()
+        return ttfb, time.perf_counter() - start, body
+
+
+class AppTarget:
+    def __init__(self, stream, audio_format, stub_rtf=None):
+        # Measure the model, not the caches
+        os.environ.setdefault('TTS_CACHE_MEMORY_MB', '0')
+        os.environ.setdefault('TTS_SEGMENT_CACHE_MB', '0')
+        os.environ.pop('TTS_CACHE_DIR', None)
+
+        import models
+        from startup import Startup
+        if stub_rtf is not None:
+            models.load_chatterbox = lambda model_type, device: StubChatterboxModel(stub_rtf)
+
+        import app as service
+        # Models load on a background thread; wait for them like /health/ready would
+        service.startup.wait()
+        if stub_rtf is not None and not service.chatterbox_installed:
+            # The stub stands in for chatterbox-tts, so redo the startup it refused to run
+            service.chatterbox_installed = True
+            service.startup = Startup()
+            service.startup.run(service.load_models, background=False)
+        if service.startup.state == 'failed':
+            raise RuntimeError(f"The service failed to start: {service.startup.error}")
+        self.service = service
+        self.client = service.app.test_client()
+        self.stream = stream
+        self.audio_format = audio_format
+
+    def synthesize(self, text):
+        payload = {"text": text, "stream": self.stream, "format": self.audio_format}
+        start = time.perf_counter()
+        response = self.client.post('/tts/synthesize', json=payload, buffered=False)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        chunks = iter(response.response)
+        first = next(chunks, b'')
+        ttfb = time.perf_counter() - start
+        body = first + b''.join(chunks)
+        response.close()
+        return ttfb, time.perf_counter() - start, body
+
+
+class ModelTarget:
+    def __init__(self, model_type, device, stub_rtf=None):
+        if stub_rtf is not None:
+            self.model = StubChatterboxModel(stub_rtf)
+        else:
+            from models import load_chatterbox
+            self.model = load_chatterbox(model_type, device)
+        self.model_type = model_type
+
+    def synthesize(self, text):
+        start = time.perf_counter()
+        if self.model_type == 'multilingual':
+            wav = self.model.generate(text, language_id='en')
+        else:
+            wav = self.model.generate(text)
+        latency = time.perf_counter() - start
+        return None, latency, wav.shape[-1] / self.model.sr
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+def run_level(target, texts, concurrency, requests, service_pid=None, repeat_texts=False):
+    rows = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(index):
+        text = texts[index % len(texts)]
+        if not repeat_texts:
+            # Distinct text per request so caching and in-flight dedupe don't hide synthesis cost
+            text = f"Question {index + 1}. {text}"
+        try:
+            ttfb, latency, body = target.synthesize(text)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        duration = body if isinstance(body, float) else wav_duration(body)
+        with lock:
+            rows.append({"ttfb": ttfb, "latency": latency, "duration": duration})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = [r["latency"] for r in rows]
+    ttfbs = [r["ttfb"] for r in rows if r["ttfb"] is not None]
+    rtfs = [r["latency"] / r["duration"] for r in rows if r["duration"]]
+    audio_seconds = sum(r["duration"] or 0 for r in rows)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": len(rows),
+        "errors": len(errors),
+        "errorSamples": errors[:3],
+        "ttfbP50Ms": _ms(ttfbs, 50),
+        "ttfbP95Ms": _ms(ttfbs, 95),
+        "latencyP50Ms": _ms(latencies, 50),
+        "latencyP95Ms": _ms(latencies, 95),
+        "meanRtf": round(float(np.mean(rtfs)), 3) if rtfs else None,
+        "throughputRps": round(len(rows) / wall, 3) if wall else None,
+        "audioSecondsPerSecond": round(audio_seconds / wall, 3) if wall else None,
+        "wallSeconds": round(wall, 2),
+        "peakRssMb": peak_rss_mb(service_pid),
+    }
+
+
+def _ms(values, percentile):
+    if not values:
+        return None
+    return round(float(np.percentile(values, percentile)) * 1000, 1)
+
+
+def print_report(results):
+    print()
+    print(f"{'length':<8}{'conc':>5}{'ok':>5}{'err':>5}{'ttfb p50':>10}{'lat p50':>10}"
+          f"{'lat p95':>10}{'RTF':>7}{'req/s':>8}{'RSS MB':>9}")
+    print("-" * 77)
+    for r in results:
+        ttfb = f"{r['ttfbP50Ms']:.0f}" if r['ttfbP50Ms'] is not None else '-'
+        lat50 = f"{r['latencyP50Ms']:.0f}" if r['latencyP50Ms'] is not None else '-'
+        lat95 = f"{r['latencyP95Ms']:.0f}" if r['latencyP95Ms'] is not None else '-'
+        rtf = f"{r['meanRtf']:.2f}" if r['meanRtf'] is not None else '-'
+        rss = f"{r['peakRssMb']:.0f}" if r['peakRssMb'] is not None else '-'
+        print(f"{r['length']:<8}{r['concurrency']:>5}{r['completed']:>5}{r['errors']:>5}{ttfb:>10}"
+              f"{lat50:>10}{lat95:>10}{rtf:>7}{r['throughputRps'] or 0:>8.2f}{rss:>9}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chatterbox TTS latency and throughput")
+    parser.add_argument('--mode', choices=['http', 'app', 'model'], default='app')
+    parser.add_argument('--url', default='http://localhost:5002', help="Service URL for --mode http")
+    parser.add_argument('--stub', action='store_true', help="Use a stub model (offline, no weights)")
+    parser.add_argument('--stub-rtf', type=float, default=0.3, help="Real-time factor of the stub model")
+    parser.add_argument('--model', default=os.environ.get('CHATTERBOX_MODEL', 'turbo'),
+                        help="Model type for --mode model")
+    parser.add_argument('--device', default=None, help="Device for --mode model (default: cuda if available)")
+    parser.add_argument('--lengths', nargs='+', default=list(CORPUS), choices=list(CORPUS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=None,
+                        help="Requests per level (default: 2 x concurrency, at least 4)")
+    parser.add_argument('--stream', action='store_true', help="Use streaming synthesis (meaningful TTFB)")
+    parser.add_argument('--format', default='wav', help="Output format for http/app modes (RTF needs wav)")
+    parser.add_argument('--repeat-texts', action='store_true',
+                        help="Send corpus texts verbatim (measures cache/dedupe instead of synthesis)")
+    parser.add_argument('--service-pid', type=int, help="Report peak RSS of this PID instead of the benchmark")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.mode == 'http' and args.stub:
+        parser.error("--stub applies to app/model modes; start the service itself for http")
+
+    stub_rtf = args.stub_rtf if args.stub else None
+    if args.mode == 'http':
+        target = HttpTarget(args.url, args.stream, args.format)
+    elif args.mode == 'app':
+        target = AppTarget(args.stream, args.format, stub_rtf)
+    else:
+        import torch
+        device = args.device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        target = ModelTarget(args.model, device, stub_rtf)
+
+    print(f"🎙️ Benchmarking mode={args.mode}{' (stub)' if args.stub else ''} "
+          f"lengths={','.join(args.lengths)} concurrency={args.concurrency}")
+
+    # One untimed request so model loading and first-call costs don't skew level 1
+    print("⏳ Warming up...")
+    target.synthesize(CORPUS[args.lengths[0]][0])
+
+    results = []
+    for length in args.lengths:
+        for concurrency in args.concurrency:
+            requests = args.requests or max(4, 2 * concurrency)
+            print(f"⏳ {length} x{concurrency} ({requests} requests)...")
+            result = run_level(target, CORPUS[length], concurrency, requests,
+                               args.service_pid, args.repeat_texts)
+            result["length"] = length
+            results.append(result)
+
+    print_report(results)
+
+    if args.output:
+        report = {
+            "mode": args.mode,
+            "stub": args.stub,
+            "stream": args.stream,
+            "format": args.format,
+            "repeatTexts": args.repeat_texts,
+            "model": args.model if args.mode == 'model' else None,
+            "url": args.url if args.mode == 'http' else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "results": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
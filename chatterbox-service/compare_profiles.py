@@ -0,0 +1,185 @@
+"""
+Latency/quality report for Chatterbox CPU profiles
+
+Loads the model once per profile (see cpu_profile.PRESETS), synthesizes a
+fixed set of interview prompts and reports generation latency, real-time
+factor and - with --asr - word error rate of a Whisper transcript of the
+generated audio against the input text, as a round-trip intelligibility
+check. Audio duration relative to the first profile is reported too, since
+quantization problems often show up as truncated or run-on speech.
+
+Usage:
+    python compare_profiles.py --model turbo
+    python compare_profiles.py --profiles baseline int8 int8-compile --threads 8 --asr base --output report.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import re
+import time
+
+import numpy as np
+import torch
+
+from cpu_profile import PRESETS, CpuProfile
+from models import MODEL_TYPES, load_chatterbox
+
+PROMPTS = [
+    "Hello, and welcome to your interview.",
+    "Can you tell me a little about yourself and your background?",
+    "Describe a challenging project you worked on, and how you handled the obstacles along the way.",
+    "Great, thank you. Let's move on to the next question.",
+    "Walk me through how you would design a rate limiter for a public API that serves millions of requests per day.",
+    "That's all the questions I have. Thanks for your time, and good luck!",
+]
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Levenshtein distance over words divided by the reference length."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_asr(model_size):
+    try:
+        import whisper
+    except ImportError:
+        print("⚠️ --asr needs openai-whisper: pip install openai-whisper")
+        return None
+    print(f"📥 Loading Whisper ({model_size}) for round-trip WER...")
+    return whisper.load_model(model_size, device='cpu')
+
+
+def transcribe(asr, wav, sample_rate):
+    import torchaudio.functional as F
+    audio = F.resample(wav.detach().float().cpu().squeeze(0), sample_rate, 16000)
+    return asr.transcribe(audio.numpy(), language='en', fp16=False)["text"].strip()
+
+
+def run_profile(name, model_type, device, prompts, threads, asr):
+    profile = CpuProfile.from_preset(name, num_threads=threads)
+    profile.apply_threads()
+
+    load_start = time.perf_counter()
+    model = load_chatterbox(model_type, device)
+    prepared = profile.prepare(model, model_type, device)
+    load_time = time.perf_counter() - load_start
+
+    rows = []
+    for text in prompts:
+        start = time.perf_counter()
+        with profile.inference_context():
+            if model_type == 'multilingual':
+                wav = model.generate(text, language_id='en')
+            else:
+                wav = model.generate(text)
+        latency = time.perf_counter() - start
+        duration = wav.shape[-1] / model.sr
+
+        row = {
+            "text": text,
+            "duration": round(duration, 2),
+            "latency": round(latency, 3),
+            "rtf": round(latency / duration, 3) if duration else None,
+            "wer": None,
+        }
+        if asr is not None:
+            row["transcript"] = transcribe(asr, wav, model.sr)
+            row["wer"] = round(word_error_rate(text, row["transcript"]), 4)
+        rows.append(row)
+
+    del model
+    gc.collect()
+
+    wers = [r["wer"] for r in rows if r["wer"] is not None]
+    latencies = [r["latency"] for r in rows]
+    total_audio = sum(r["duration"] for r in rows)
+    return {
+        "profile": name,
+        "settings": profile.info(),
+        "applied": prepared["applied"],
+        "loadTime": round(load_time, 2),
+        "warmupSeconds": prepared["warmupSeconds"],
+        "meanWer": round(float(np.mean(wers)), 4) if wers else None,
+        "meanLatency": round(float(np.mean(latencies)), 3),
+        "p95Latency": round(float(np.percentile(latencies, 95)), 3),
+        "rtf": round(sum(latencies) / total_audio, 3) if total_audio else None,
+        "totalAudioSeconds": round(total_audio, 2),
+        "samples": rows,
+    }
+
+
+def print_report(reports):
+    baseline_audio = reports[0]["totalAudioSeconds"] or 1
+    print()
+    print(f"{'profile':<16}{'load s':>8}{'WER':>8}{'mean s':>9}{'p95 s':>9}{'RTF':>8}{'speedup':>9}{'dur':>7}")
+    print("-" * 74)
+    for report in reports:
+        wer = f"{report['meanWer']:.3f}" if report['meanWer'] is not None else '-'
+        rtf = f"{report['rtf']:.3f}" if report['rtf'] is not None else '-'
+        speedup = reports[0]["meanLatency"] / report["meanLatency"] if report["meanLatency"] else 0
+        print(f"{report['profile']:<16}{report['loadTime']:>8.1f}{wer:>8}"
+              f"{report['meanLatency']:>9.3f}{report['p95Latency']:>9.3f}{rtf:>8}"
+              f"{speedup:>8.2f}x{report['totalAudioSeconds'] / baseline_audio:>7.2f}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chatterbox CPU profiles on interview prompts")
+    parser.add_argument('--model', default=os.environ.get('CHATTERBOX_MODEL', 'turbo'), choices=MODEL_TYPES)
+    parser.add_argument('--profiles', nargs='+', default=['baseline', 'default', 'int8', 'int8-compile'],
+                        choices=list(PRESETS))
+    parser.add_argument('--device', default='cpu')
+    parser.add_argument('--threads', type=int, default=None, help="torch intra-op threads for every profile")
+    parser.add_argument('--texts', help="File with one prompt per line (default: built-in interview prompts)")
+    parser.add_argument('--asr', metavar='WHISPER_SIZE', help="Transcribe outputs with Whisper to report WER")
+    parser.add_argument('--seed', type=int, default=0, help="torch seed, reset before each profile")
+    parser.add_argument('--output', help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    prompts = PROMPTS
+    if args.texts:
+        with open(args.texts, encoding='utf-8') as f:
+            prompts = [line.strip() for line in f if line.strip()]
+
+    asr = load_asr(args.asr) if args.asr else None
+
+    print(f"🎙️ Comparing {', '.join(args.profiles)} on {len(prompts)} prompts "
+          f"(model: {args.model}, device: {args.device})")
+
+    reports = []
+    for name in args.profiles:
+        print(f"⏳ Running {name}...")
+        torch.manual_seed(args.seed)
+        reports.append(run_profile(name, args.model, args.device, prompts, args.threads, asr))
+
+    print_report(reports)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"model": args.model, "device": args.device, "reports": reports}, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
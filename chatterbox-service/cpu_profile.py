@@ -0,0 +1,213 @@
+"""
+CPU inference profile for the Chatterbox TTS Service
+
+Without a GPU, Chatterbox runs plain fp32 with torch's default threading.
+A profile bundles the CPU speedups we can apply to a loaded model:
+
+- explicit intra-op / inter-op thread counts
+- dynamic int8 quantization of the Linear layers in selected submodules
+- `torch.compile` of selected submodules
+- running generation under `torch.inference_mode()`
+- a warmup generation right after loading, so compilation and one-off
+  allocations happen before the first real request
+
+Profiles are picked with TTS_CPU_PROFILE (see PRESETS) and individual
+settings can be overridden with their own env vars. `compare_profiles.py`
+measures latency and round-trip quality for each preset.
+"""
+
+import contextlib
+import os
+import time
+
+import torch
+
+# Named starting points; env vars below override individual settings
+PRESETS = {
+    'baseline': {"quantize": False, "compile": False, "inference_mode": False, "warmup": False},
+    'default': {"quantize": False, "compile": False, "inference_mode": True, "warmup": False},
+    'int8': {"quantize": True, "compile": False, "inference_mode": True, "warmup": True},
+    'compile': {"quantize": False, "compile": True, "inference_mode": True, "warmup": True},
+    'int8-compile': {"quantize": True, "compile": True, "inference_mode": True, "warmup": True},
+}
+
+DEFAULT_WARMUP_TEXT = "Hello, and welcome to your interview. Let's get started."
+
+
+def _env_flag(name, default):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def _resolve(root, path):
+    """Return (parent, attribute name, module) for a dotted path like 't3.tfmr'."""
+    parent = root
+    names = path.split('.')
+    for name in names[:-1]:
+        parent = getattr(parent, name, None)
+        if parent is None:
+            return None, None, None
+    return parent, names[-1], getattr(parent, names[-1], None)
+
+
+class CpuProfile:
+    def __init__(self, name='default', num_threads=None, interop_threads=None,
+                 quantize=False, quantize_modules=('t3',),
+                 compile=False, compile_modules=('t3.tfmr',), compile_mode='default',
+                 inference_mode=True, warmup=False, warmup_text=DEFAULT_WARMUP_TEXT):
+        self.name = name
+        self.num_threads = num_threads
+        self.interop_threads = interop_threads
+        self.quantize = quantize
+        self.quantize_modules = list(quantize_modules)
+        self.compile = compile
+        self.compile_modules = list(compile_modules)
+        self.compile_mode = compile_mode
+        self.inference_mode = inference_mode
+        self.warmup = warmup
+        self.warmup_text = warmup_text
+
+    @classmethod
+    def from_preset(cls, name, **overrides):
+        if name not in PRESETS:
+            raise ValueError(f"Unknown CPU profile '{name}'. Available: {', '.join(PRESETS)}")
+        settings = dict(PRESETS[name])
+        settings.update(overrides)
+        return cls(name=name, **settings)
+
+    @classmethod
+    def from_env(cls):
+        """
+        TTS_CPU_PROFILE picks the preset; TORCH_NUM_THREADS,
+        TORCH_INTEROP_THREADS, TTS_QUANTIZE, TTS_QUANTIZE_MODULES,
+        TTS_TORCH_COMPILE, TTS_COMPILE_MODULES, TTS_COMPILE_MODE,
+        TTS_INFERENCE_MODE, TTS_WARMUP_ON_LOAD and TTS_WARMUP_TEXT override it.
+        """
+        name = os.environ.get('TTS_CPU_PROFILE', 'default')
+        preset = PRESETS.get(name)
+        if preset is None:
+            print(f"⚠️ Unknown TTS_CPU_PROFILE '{name}', using 'default'")
+            name, preset = 'default', PRESETS['default']
+
+        num_threads = os.environ.get('TORCH_NUM_THREADS')
+        interop_threads = os.environ.get('TORCH_INTEROP_THREADS')
+        return cls(
+            name=name,
+            num_threads=int(num_threads) if num_threads else None,
+            interop_threads=int(interop_threads) if interop_threads else None,
+            quantize=_env_flag('TTS_QUANTIZE', preset["quantize"]),
+            quantize_modules=_env_list('TTS_QUANTIZE_MODULES', ['t3']),
+            compile=_env_flag('TTS_TORCH_COMPILE', preset["compile"]),
+            compile_modules=_env_list('TTS_COMPILE_MODULES', ['t3.tfmr']),
+            compile_mode=os.environ.get('TTS_COMPILE_MODE', 'default'),
+            inference_mode=_env_flag('TTS_INFERENCE_MODE', preset["inference_mode"]),
+            warmup=_env_flag('TTS_WARMUP_ON_LOAD', preset["warmup"]),
+            warmup_text=os.environ.get('TTS_WARMUP_TEXT', DEFAULT_WARMUP_TEXT),
+        )
+
+    def apply_threads(self):
+        """Set torch thread pools. Call once at startup, before any model runs."""
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        if self.interop_threads:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                # Only allowed before the inter-op pool has started
+                print(f"⚠️ Could not set inter-op threads: {e}")
+
+    def inference_context(self):
+        return torch.inference_mode() if self.inference_mode else contextlib.nullcontext()
+
+    def prepare(self, model, model_type, device):
+        """Quantize/compile a freshly loaded model in place, then warm it up."""
+        applied = []
+        compiled = []  # (parent, name, eager module) to restore if compilation fails
+        if self.quantize:
+            if device != 'cpu':
+                print(f"⚠️ Skipping int8 quantization of {model_type}: only supported on CPU")
+            else:
+                for path in self.quantize_modules:
+                    if self._quantize(model, path):
+                        applied.append(f"int8:{path}")
+
+        if self.compile:
+            for path in self.compile_modules:
+                eager = self._compile(model, path)
+                if eager:
+                    compiled.append(eager)
+                    applied.append(f"compile:{path}")
+
+        warmup_time = None
+        if self.warmup:
+            start = time.perf_counter()
+            try:
+                with self.inference_context():
+                    if model_type == 'multilingual':
+                        model.generate(self.warmup_text, language_id='en')
+                    else:
+                        model.generate(self.warmup_text)
+            except Exception as e:
+                if not compiled:
+                    raise
+                # torch.compile only fails on first call - fall back to eager modules
+                print(f"⚠️ Compiled warmup failed, running {model_type} eagerly: {e}")
+                for parent, name, module in compiled:
+                    setattr(parent, name, module)
+                applied = [item for item in applied if not item.startswith('compile:')]
+            warmup_time = time.perf_counter() - start
+            print(f"🔥 Warmed up {model_type} in {warmup_time:.1f}s")
+
+        return {"applied": applied, "warmupSeconds": round(warmup_time, 2) if warmup_time else None}
+
+    def _quantize(self, model, path):
+        parent, name, module = _resolve(model, path)
+        if not isinstance(module, torch.nn.Module):
+            print(f"⚠️ Cannot quantize '{path}': no such submodule")
+            return False
+        try:
+            torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        except Exception as e:
+            print(f"⚠️ int8 quantization of '{path}' failed, keeping fp32: {e}")
+            return False
+        print(f"⚡ Quantized '{path}' Linear layers to int8")
+        return True
+
+    def _compile(self, model, path):
+        """Compile a submodule in place. Returns (parent, name, eager module) or None."""
+        parent, name, module = _resolve(model, path)
+        if not isinstance(module, torch.nn.Module):
+            print(f"⚠️ Cannot compile '{path}': no such submodule")
+            return None
+        if not hasattr(torch, 'compile'):
+            print("⚠️ torch.compile requires torch 2.0+")
+            return None
+        try:
+            # Autoregressive decoding changes sequence length every step
+            setattr(parent, name, torch.compile(module, mode=self.compile_mode, dynamic=True))
+        except Exception as e:
+            print(f"⚠️ torch.compile of '{path}' failed, running eagerly: {e}")
+            return None
+        print(f"⚡ Compiled '{path}' (mode: {self.compile_mode})")
+        return parent, name, module
+
+    def info(self):
+        return {
+            "profile": self.name,
+            "numThreads": torch.get_num_threads(),
+            "interopThreads": torch.get_num_interop_threads(),
+            "quantize": self.quantize_modules if self.quantize else [],
+            "compile": self.compile_modules if self.compile else [],
+            "compileMode": self.compile_mode if self.compile else None,
+            "inferenceMode": self.inference_mode,
+            "warmupOnLoad": self.warmup,
+        }
@@ -0,0 +1,98 @@
+"""
+Audio output encoding for the Chatterbox TTS Service
+
+WAV is written directly from the generated samples. Compressed formats
+(opus in an ogg container, mp3) are produced by piping 16-bit PCM through
+ffmpeg on a small encoder pool, so the model is free to start the next
+synthesis while the previous one is being encoded.
+"""
+
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+# format -> (mimetype, file extension, ffmpeg args)
+OUTPUT_FORMATS = {
+    'wav': ('audio/wav', 'wav', None),
+    'opus': ('audio/ogg', 'ogg', ['-c:a', 'libopus', '-application', 'voip', '-f', 'ogg']),
+    'ogg': ('audio/ogg', 'ogg', ['-c:a', 'libopus', '-application', 'voip', '-f', 'ogg']),
+    'mp3': ('audio/mpeg', 'mp3', ['-c:a', 'libmp3lame', '-f', 'mp3']),
+}
+
+DEFAULT_BITRATES = {'opus': '32k', 'ogg': '32k', 'mp3': '64k'}
+
+
+class AudioEncodeError(Exception):
+    """Raised when ffmpeg can't produce the requested output format."""
+
+
+def wav_header(sample_rate, data_size=None, channels=1, bits_per_sample=16):
+    """
+    Header for a 16-bit PCM WAV file.
+
+    Without `data_size` (a stream of unknown length) the RIFF and data sizes
+    are set to 0xFFFFFFFF, which browsers, ffmpeg and most players treat as
+    "read until the stream ends".
+    """
+    riff_size = 0xFFFFFFFF if data_size is None else 36 + data_size
+    data_size = 0xFFFFFFFF if data_size is None else data_size
+    byte_rate = sample_rate * channels * bits_per_sample // 8
+    block_align = channels * bits_per_sample // 8
+    return (
+        b'RIFF' + struct.pack('<I', riff_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, byte_rate, block_align, bits_per_sample)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+
+def wav_to_pcm16(wav):
+    """Convert a float waveform tensor in [-1, 1] to little-endian 16-bit PCM bytes."""
+    samples = wav.detach().squeeze().clamp(-1.0, 1.0)
+    return (samples * 32767.0).to(torch.int16).cpu().numpy().astype('<i2').tobytes()
+
+
+def decode_wav16(data):
+    """
+    Read a 16-bit mono WAV written by `wav_header` back into a (1, samples)
+    float tensor. Returns (waveform, sample rate).
+    """
+    sample_rate = struct.unpack_from('<I', data, 24)[0]
+    samples = torch.frombuffer(bytearray(data[44:]), dtype=torch.int16).float() / 32767.0
+    return samples.unsqueeze(0), sample_rate
+
+
+def encode_pcm16(pcm, sample_rate, fmt='wav', bitrate=None):
+    """Encode 16-bit mono PCM bytes to the requested output format."""
+    if fmt == 'wav':
+        return wav_header(sample_rate, len(pcm)) + pcm
+
+    _, _, codec_args = OUTPUT_FORMATS[fmt]
+    command = [
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+        *codec_args,
+        '-b:a', bitrate or DEFAULT_BITRATES[fmt],
+        'pipe:1',
+    ]
+    try:
+        proc = subprocess.run(command, input=pcm, capture_output=True, check=False)
+    except FileNotFoundError:
+        raise AudioEncodeError("ffmpeg not found on PATH")
+
+    if proc.returncode != 0 or not proc.stdout:
+        raise AudioEncodeError(proc.stderr.decode(errors='ignore').strip() or f"ffmpeg produced no {fmt} audio")
+    return proc.stdout
+
+
+class AudioEncoder:
+    """Bounded pool that encodes finished waveforms off the inference thread."""
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tts-encoder')
+
+    def submit(self, wav, sample_rate, fmt='wav', bitrate=None):
+        """Queue a waveform tensor for encoding. Returns a Future for the bytes."""
+        pcm = wav_to_pcm16(wav)
+        return self._pool.submit(encode_pcm16, pcm, sample_rate, fmt, bitrate)
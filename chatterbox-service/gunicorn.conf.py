@@ -0,0 +1,47 @@
+"""
+Gunicorn settings for the Chatterbox TTS Service
+
+    gunicorn -c gunicorn.conf.py app:app
+
+One process holds the Chatterbox models. gthread workers keep idle and keep-alive
+connections on an event loop and run requests on a bounded thread pool;
+handlers block on the synthesis queue, which runs generation on a
+single thread with its own depth limit (TTS_QUEUE_MAX_DEPTH -> 429).
+
+On SIGTERM the service stops accepting work (new requests get 503), lets
+in-flight requests finish for up to GRACEFUL_TIMEOUT seconds, then exits.
+Queued prefetch work is cancelled at once; live requests still complete.
+"""
+
+import os
+import signal
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5002')}"
+workers = 1
+worker_class = 'gthread'
+# Request threads mostly wait on the queue and encoder; a streamed response
+# holds one until its last sentence is sent
+threads = int(os.environ.get('WEB_THREADS', str(max(8, 4 * (os.cpu_count() or 1)))))
+timeout = int(os.environ.get('WEB_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+accesslog = '-'
+
+
+def post_worker_init(worker):
+    service = sys.modules['app']
+    handle_exit = worker.handle_exit
+
+    def drain_and_exit(sig, frame):
+        service.begin_drain()
+        handle_exit(sig, frame)
+
+    worker.handle_exit = drain_and_exit
+    signal.signal(signal.SIGTERM, drain_and_exit)
+
+
+def worker_exit(server, worker):
+    service = sys.modules.get('app')
+    if service is not None:
+        service.drain(timeout=graceful_timeout)
@@ -0,0 +1,205 @@
+"""
+Chatterbox model residency for the Chatterbox TTS Service
+
+Turbo, standard and multilingual Chatterbox models can be served from one
+process. Each is loaded on first use and kept resident within a memory
+budget; when loading another model would exceed it, the least recently used
+models are unloaded first.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+
+MODEL_TYPES = ('turbo', 'standard', 'multilingual')
+
+# Approximate resident size, used before a model is loaded to decide what to evict
+MODEL_MEMORY_MB = {
+    'turbo': 2000,
+    'standard': 3000,
+    'multilingual': 3000,
+}
+
+
+class ModelLoadError(Exception):
+    """Raised when a Chatterbox model can't be imported or loaded."""
+
+
+def load_chatterbox(model_type, device):
+    """Import and load one Chatterbox model type."""
+    try:
+        if model_type == 'turbo':
+            from chatterbox.tts_turbo import ChatterboxTurboTTS
+            print(f"📥 Loading Chatterbox-Turbo model...")
+            return ChatterboxTurboTTS.from_pretrained(device=device)
+        if model_type == 'multilingual':
+            from chatterbox.mtl_tts import ChatterboxMultilingualTTS
+            print(f"📥 Loading Chatterbox-Multilingual model...")
+            return ChatterboxMultilingualTTS.from_pretrained(device=device)
+        from chatterbox.tts import ChatterboxTTS
+        print(f"📥 Loading Chatterbox model...")
+        return ChatterboxTTS.from_pretrained(device=device)
+    except ImportError as e:
+        print(f"⚠️ Chatterbox not installed: {e}")
+        print("   To enable: pip install chatterbox-tts")
+        raise ModelLoadError(f"Chatterbox not installed: {e}")
+    except Exception as e:
+        raise ModelLoadError(f"Failed to load Chatterbox {model_type} model: {e}")
+
+
+def model_memory_bytes(model, model_type):
+    """Bytes held by the model's torch modules (falls back to the size table)."""
+    total = 0
+    for component in vars(model).values():
+        if isinstance(component, torch.nn.Module):
+            total += sum(p.numel() * p.element_size() for p in component.parameters())
+            total += sum(b.numel() * b.element_size() for b in component.buffers())
+    return total or MODEL_MEMORY_MB.get(model_type, 3000) * 1024 * 1024
+
+
+class ChatterboxModelPool:
+    """
+    Keeps Chatterbox model types resident within a memory budget.
+
+    `get` loads lazily; callers must hold the model lock, since loading may
+    unload a model another caller is using. A single model larger than the
+    whole budget is still loaded (alone). The load itself runs outside the
+    pool lock, so `stats()` and `loaded_models()` answer during a cold load. `prepare(model, model_type)`, if
+    given, runs on each freshly loaded model (quantization, compile, warmup)
+    and its return value is reported in `stats`. `on_load(model_type, seconds)`
+    is called after each load (e.g. for metrics).
+    """
+
+    def __init__(self, device, memory_budget_mb=6144, allowed_models=MODEL_TYPES, prepare=None, on_load=None):
+        self.device = device
+        self.prepare = prepare
+        self.on_load = on_load
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.allowed_models = tuple(allowed_models)
+        self._models = OrderedDict()  # type -> {"model", "builtinConds", "memory", "loadTime", "lastUsed"}
+        self._errors = {}  # type -> last load error
+        self._loading = {}  # type -> {"done": Event, "memory": estimated bytes, "error": ModelLoadError}
+        self._lock = threading.Lock()
+
+    def get(self, model_type):
+        """Return the loaded entry for `model_type`, loading it if needed."""
+        if model_type not in self.allowed_models:
+            raise ModelLoadError(f"Model '{model_type}' is not allowed. Allowed: {', '.join(self.allowed_models)}")
+
+        while True:
+            with self._lock:
+                entry = self._models.get(model_type)
+                if entry is not None:
+                    self._models.move_to_end(model_type)
+                    entry["lastUsed"] = time.time()
+                    return entry
+
+                loading = self._loading.get(model_type)
+                if loading is None:
+                    estimate = MODEL_MEMORY_MB.get(model_type, 3000) * 1024 * 1024
+                    self._make_room(estimate)
+                    loading = {"done": threading.Event(), "memory": estimate, "error": None}
+                    self._loading[model_type] = loading
+                    break
+
+            # Another caller is loading this type; use its result
+            loading["done"].wait()
+            if loading["error"] is not None:
+                raise loading["error"]
+
+        try:
+            entry = self._load(model_type)
+        except ModelLoadError as e:
+            loading["error"] = e
+            with self._lock:
+                self._errors[model_type] = str(e)
+            raise
+        else:
+            with self._lock:
+                self._models[model_type] = entry
+                self._errors.pop(model_type, None)
+        finally:
+            with self._lock:
+                self._loading.pop(model_type, None)
+            loading["done"].set()
+
+        print(f"✅ Chatterbox {model_type} loaded in {entry['loadTime']:.1f}s")
+        if self.on_load is not None:
+            self.on_load(model_type, entry["loadTime"])
+        return entry
+
+    def _load(self, model_type):
+        """Load and prepare one model (without the pool lock). Returns its entry."""
+        start = time.perf_counter()
+        model = load_chatterbox(model_type, self.device)
+
+        prepared = None
+        if self.prepare is not None:
+            try:
+                prepared = self.prepare(model, model_type)
+            except Exception as e:
+                raise ModelLoadError(f"Failed to prepare Chatterbox {model_type} model: {e}")
+
+        return {
+            "model": model,
+            # the model's own default voice, restored when no reference is given
+            "builtinConds": getattr(model, 'conds', None),
+            "memory": model_memory_bytes(model, model_type),
+            "loadTime": time.perf_counter() - start,
+            "lastUsed": time.time(),
+            "prepared": prepared,
+        }
+
+    def _make_room(self, needed):
+        """Unload LRU models until `needed` fits next to the loaded and loading ones. Hold the lock."""
+        used = sum(entry["memory"] for entry in self._models.values())
+        used += sum(loading["memory"] for loading in self._loading.values())
+        evicted = False
+        while self._models and used + needed > self.memory_budget:
+            model_type, entry = self._models.popitem(last=False)
+            used -= entry["memory"]
+            evicted = True
+            print(f"♻️ Unloading Chatterbox {model_type} to stay within memory budget")
+        if evicted:
+            # Release the evicted weights before allocating the next model
+            import gc
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+    def is_loaded(self, model_type):
+        return model_type in self._models
+
+    def loaded_models(self):
+        with self._lock:
+            return {model_type: entry["model"] for model_type, entry in self._models.items()}
+
+    def last_error(self, model_type):
+        return self._errors.get(model_type)
+
+    def stats(self):
+        with self._lock:
+            models = [
+                {
+                    "model": model_type,
+                    "memoryMb": round(entry["memory"] / (1024 * 1024), 1),
+                    "loadTimeSeconds": round(entry["loadTime"], 2),
+                    "lastUsed": round(entry["lastUsed"], 1),
+                    "sampleRate": getattr(entry["model"], 'sr', None),
+                    "optimizations": entry["prepared"],
+                }
+                for model_type, entry in self._models.items()
+            ]
+            errors = dict(self._errors)
+            loading = list(self._loading)
+        return {
+            "device": self.device,
+            "allowed": list(self.allowed_models),
+            "memoryBudgetMb": round(self.memory_budget / (1024 * 1024)),
+            "memoryUsedMb": round(sum(m["memoryMb"] for m in models), 1),
+            "loaded": models,
+            "loading": loading,
+            "loadErrors": errors,
+        }
@@ -0,0 +1,97 @@
+"""
+Prefetch jobs for the Chatterbox TTS Service
+
+When an interview starts the backend already knows what the interviewer is
+about to say. A prefetch job takes a list of texts, synthesizes them in the
+background at low priority and keeps a handle on each item so clients can
+poll the job or fetch items as they complete. Finished audio also lands in
+the synthesis cache, so a later live request for the same text is a hit.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class PrefetchJob:
+    def __init__(self, texts, futures, settings):
+        self.id = uuid.uuid4().hex
+        self.created = time.time()
+        self.texts = texts
+        self.futures = futures  # one Future per text, resolving to encoded audio bytes
+        self.settings = settings  # format/mimetype etc. shared by every item
+
+    def item_status(self, index):
+        future = self.futures[index]
+        if not future.done():
+            return 'pending'
+        return 'failed' if future.exception() is not None else 'completed'
+
+    @property
+    def status(self):
+        statuses = [self.item_status(i) for i in range(len(self.texts))]
+        if 'pending' in statuses:
+            return 'pending'
+        return 'failed' if all(s == 'failed' for s in statuses) else 'completed'
+
+    def wait_item(self, index, timeout=None):
+        """Block up to `timeout` seconds for an item. Returns its audio or None if still pending."""
+        try:
+            return self.futures[index].result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+
+    def to_dict(self):
+        items = []
+        for index, text in enumerate(self.texts):
+            status = self.item_status(index)
+            item = {"index": index, "text": text[:80], "status": status}
+            if status == 'completed':
+                item["bytes"] = len(self.futures[index].result())
+            elif status == 'failed':
+                item["error"] = str(self.futures[index].exception())
+            items.append(item)
+
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "createdAt": self.created,
+            "format": self.settings.get('format'),
+            "completed": sum(1 for item in items if item["status"] == 'completed'),
+            "total": len(items),
+            "items": items,
+        }
+
+
+class PrefetchJobStore:
+    """Keeps the most recent `max_jobs` jobs; the oldest are forgotten first."""
+
+    def __init__(self, max_jobs=64):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_created = 0
+
+    def add(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            self.total_created += 1
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "jobs": len(jobs),
+            "maxJobs": self.max_jobs,
+            "pendingJobs": sum(1 for job in jobs if job.status == 'pending'),
+            "totalCreated": self.total_created,
+        }
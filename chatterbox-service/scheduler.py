@@ -0,0 +1,286 @@
+"""
+Synthesis request queue for the Chatterbox TTS Service
+
+Flask handles each request on its own thread, but Chatterbox is a single
+shared model whose speaker conditioning is swapped per request. All
+generation is funnelled through one worker thread instead: pending jobs with
+the same settings (voice reference, language) are grouped and handed over
+together, so the conditioning is set up once per group rather than once per
+request. Queue depth is bounded; when it is full callers get a
+`QueueFullError` carrying a Retry-After estimate.
+
+Jobs carry a priority. Live requests (PRIORITY_LIVE) are always taken
+before background prefetch work (PRIORITY_PREFETCH). A running group is
+never interrupted, so prefetch jobs run one per group: a live request waits
+for at most one prefetch generation.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+PRIORITY_LIVE = 0
+PRIORITY_PREFETCH = 10
+
+
+class QueueFullError(Exception):
+    """Raised when the synthesis queue is at its depth limit."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Synthesis queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SynthesisQueue:
+    """
+    Groups queued jobs by `settings` and hands each group to `run_batch`.
+
+    `run_batch(settings, texts)` must return a list of waveforms in the same
+    order as `texts` (an Exception in place of a waveform fails only that job).
+    `max_depth` limits pending jobs per priority level, so a large prefetch
+    backlog never causes live requests to be rejected. `on_batch(size,
+    queue_waits, seconds)`, if given, is called after every group (metrics).
+    `ready(settings)`, if given, says whether jobs with these settings can
+    run now (e.g. their model is loaded); other jobs wait, without holding up
+    the rest, until `wake()` is called.
+    """
+
+    def __init__(self, run_batch, max_depth=32, max_batch_size=4, window_ms=20, stats_window=500, on_batch=None,
+                 ready=None):
+        self.run_batch = run_batch
+        self.on_batch = on_batch
+        self.ready = ready
+        self.max_depth = max(max_depth, 1)
+        self.max_batch_size = max(max_batch_size, 1)
+        self.window = max(window_ms, 0) / 1000.0
+
+        self._pending = []  # [priority, settings, text, future, submitted, timer]
+        self._cond = threading.Condition()
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._batch_latencies = deque(maxlen=stats_window)
+        self._queue_waits = deque(maxlen=stats_window)
+        self._total_jobs = 0
+        self._total_batches = 0
+        self._rejected = 0
+        self._running = 0
+
+        self._worker = threading.Thread(target=self._run, name='tts-scheduler', daemon=True)
+        self._worker.start()
+
+    def depth(self, priority=PRIORITY_LIVE):
+        """Pending jobs that would run before or alongside a job of `priority`."""
+        with self._cond:
+            return sum(1 for job in self._pending if job[0] <= priority)
+
+    def is_full(self, priority=PRIORITY_LIVE):
+        with self._cond:
+            return sum(1 for job in self._pending if job[0] == priority) >= self.max_depth
+
+    def retry_after(self, priority=PRIORITY_LIVE):
+        """Seconds until the backlog ahead of a new `priority` job should have drained."""
+        depth = self.depth(priority)
+        with self._cond:
+            sizes = sum(self._batch_sizes)
+            seconds = sum(self._batch_latencies)
+        per_job = seconds / sizes if sizes else 1.0
+        return max(1, math.ceil(per_job * depth))
+
+    def submit_async(self, text, settings=None, priority=PRIORITY_LIVE, timer=None):
+        """
+        Queue one piece of text. Returns a Future for its waveform.
+        `queue_wait` and `generate` seconds are added to `timer`, if given.
+        """
+        return self.submit_many_async([text], settings, priority, timer)[0]
+
+    def submit_many_async(self, texts, settings=None, priority=PRIORITY_LIVE, timer=None):
+        """
+        Queue several texts (e.g. the segments of one prompt) all-or-nothing.
+        They are admitted if they fit under `max_depth`, or if nothing of this
+        priority is pending, so a prompt with more segments than `max_depth`
+        still runs on an idle queue. Returns a Future per text.
+        """
+        futures = [Future() for _ in texts]
+        with self._cond:
+            depth = sum(1 for job in self._pending if job[0] == priority)
+            full = bool(texts) and depth > 0 and depth + len(texts) > self.max_depth
+            if full:
+                self._rejected += 1
+            else:
+                submitted = time.perf_counter()
+                for text, future in zip(texts, futures):
+                    self._pending.append([priority, settings, text, future, submitted, timer])
+                self._cond.notify()
+        if full:
+            raise QueueFullError(self.retry_after(priority))
+        return futures
+
+    def submit(self, text, settings=None, priority=PRIORITY_LIVE, timeout=None, timer=None):
+        """Queue one piece of text and block until it has been generated."""
+        return self.submit_async(text, settings, priority, timer).result(timeout=timeout)
+
+    def promote(self, future, priority=PRIORITY_LIVE):
+        """
+        Raise a still-pending job to `priority`, e.g. when a live request asks
+        for text that is already queued for prefetch. Returns False if the job
+        has already started (or finished).
+        """
+        with self._cond:
+            for job in self._pending:
+                if job[3] is future:
+                    job[0] = min(job[0], priority)
+                    return True
+        return False
+
+    def cancel_pending(self, min_priority=PRIORITY_PREFETCH):
+        """Cancel queued (not yet running) jobs at `min_priority` or lower urgency."""
+        with self._cond:
+            cancelled = [job for job in self._pending if job[0] >= min_priority]
+            self._pending = [job for job in self._pending if job[0] < min_priority]
+            self._cond.notify_all()
+        for job in cancelled:
+            job[3].cancel()
+        return len(cancelled)
+
+    def wake(self):
+        """Re-check `ready` for waiting jobs, e.g. after a model finished loading."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is queued or running. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._running, timeout=timeout)
+
+    def stats(self):
+        """Queue and per-batch metrics for tuning batch size and window."""
+        with self._cond:
+            depth = sum(1 for job in self._pending if job[0] == PRIORITY_LIVE)
+            prefetch_depth = len(self._pending) - depth
+            sizes = list(self._batch_sizes)
+            latencies = sorted(self._batch_latencies)
+            waits = sorted(self._queue_waits)
+            total_jobs = self._total_jobs
+            total_batches = self._total_batches
+            rejected = self._rejected
+
+        return {
+            "queueDepth": depth,
+            "prefetchDepth": prefetch_depth,
+            "maxDepth": self.max_depth,
+            "maxBatchSize": self.max_batch_size,
+            "windowMs": round(self.window * 1000),
+            "totalJobs": total_jobs,
+            "totalBatches": total_batches,
+            "rejected": rejected,
+            "avgBatchSize": round(float(np.mean(sizes)), 2) if sizes else 0,
+            "maxObservedBatchSize": max(sizes) if sizes else 0,
+            "batchLatencyP50Ms": _percentile_ms(latencies, 50),
+            "batchLatencyP95Ms": _percentile_ms(latencies, 95),
+            "queueWaitP50Ms": _percentile_ms(waits, 50),
+            "queueWaitP95Ms": _percentile_ms(waits, 95),
+        }
+
+    def _runnable(self):
+        """Pending jobs that `ready` allows to run now. Hold the condition."""
+        if self.ready is None:
+            return self._pending
+        ready = {}
+        for job in self._pending:
+            if job[1] not in ready:
+                ready[job[1]] = self.ready(job[1])
+        return [job for job in self._pending if ready[job[1]]]
+
+    def _collect(self):
+        """
+        Wait for the most urgent (then oldest) job, give it a short window,
+        then take its compatible peers at the same priority.
+        """
+        with self._cond:
+            while True:
+                # Drop jobs whose caller cancelled them while queued
+                self._pending = [job for job in self._pending if not job[3].cancelled()]
+                if self._runnable():
+                    break
+                self._cond.notify_all()  # wake wait_idle callers
+                self._cond.wait()
+
+            deadline = time.perf_counter() + self.window
+            while True:
+                runnable = self._runnable()
+                if not runnable:
+                    # Everything was cancelled (e.g. by a drain) during the window;
+                    # _run comes straight back here to wait for new work
+                    return None, []
+                lead = min(runnable, key=lambda job: job[0])
+                priority, settings = lead[0], lead[1]
+                # Chatterbox generates a group's texts back to back, so a prefetch
+                # group of several would hold off live requests for all of them
+                limit = self.max_batch_size if priority < PRIORITY_PREFETCH else 1
+                compatible = sum(1 for job in self._pending if job[0] == priority and job[1] == settings)
+                remaining = deadline - time.perf_counter()
+                if compatible >= limit or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            rest = []
+            for job in self._pending:
+                if job[0] == priority and job[1] == settings and len(batch) < limit \
+                        and job[3].set_running_or_notify_cancel():
+                    batch.append(job)
+                elif not job[3].cancelled():
+                    rest.append(job)
+            self._pending = rest
+            self._running = len(batch)
+        return settings, batch
+
+    def _run(self):
+        while True:
+            settings, batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+
+            try:
+                results = self.run_batch(settings, [job[2] for job in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+
+            finished = time.perf_counter()
+            queue_waits = [started - job[4] for job in batch]
+            with self._cond:
+                self._total_batches += 1
+                self._total_jobs += len(batch)
+                self._batch_sizes.append(len(batch))
+                self._batch_latencies.append(finished - started)
+                self._queue_waits.extend(queue_waits)
+
+            # Texts in a group run back to back, so each job is charged the whole group
+            for job, wait in zip(batch, queue_waits):
+                timer = job[5]
+                if timer is not None:
+                    timer.add('queue_wait', wait)
+                    timer.add('generate', finished - started)
+            if self.on_batch is not None:
+                self.on_batch(len(batch), queue_waits, finished - started)
+
+            for (_, _, _, future, _, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+            with self._cond:
+                self._running = 0
+                self._cond.notify_all()
+
+
+def _percentile_ms(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 1)
@@ -0,0 +1,28 @@
+"""
+Audio stitching for the Chatterbox TTS Service
+
+Prompts are synthesized (and cached) sentence by sentence, then joined back
+into one clip. A short linear crossfade at each join hides the click that
+a hard cut between two independently generated waveforms would leave.
+"""
+
+import torch
+
+
+def crossfade_concat(waves, sample_rate, crossfade_ms=20):
+    """Join (1, samples) waveforms, overlapping `crossfade_ms` at each boundary."""
+    waves = [wav.detach().float().cpu().reshape(1, -1) for wav in waves]
+    if len(waves) == 1:
+        return waves[0]
+
+    fade = int(sample_rate * crossfade_ms / 1000)
+    result = waves[0]
+    for wav in waves[1:]:
+        overlap = min(fade, result.shape[-1], wav.shape[-1])
+        if overlap <= 0:
+            result = torch.cat([result, wav], dim=-1)
+            continue
+        ramp = torch.linspace(0.0, 1.0, overlap)
+        mixed = result[:, -overlap:] * (1.0 - ramp) + wav[:, :overlap] * ramp
+        result = torch.cat([result[:, :-overlap], mixed, wav[:, overlap:]], dim=-1)
+    return result
@@ -0,0 +1,90 @@
+"""
+Text segmentation for the Chatterbox TTS Service
+
+Splits interview prompts into sentence-sized pieces so audio can be generated
+(and sent, and cached) one sentence at a time.
+"""
+
+import re
+import unicodedata
+
+# Sentence end: . ! ? (optionally followed by closing quotes/brackets) then whitespace
+_SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+')
+# Secondary break points for overly long sentences
+_CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+
+# Typographic characters mapped to what the tokenizer (and the cache key) expects
+_SPEECH_REPLACEMENTS = {
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+    '\u2013': '-', '\u2014': ' - ', '\u2026': '...', '\u00a0': ' ',
+}
+
+
+def normalize_for_speech(text):
+    """Canonical text for synthesis: NFC, plain quotes/dashes, collapsed whitespace."""
+    text = unicodedata.normalize('NFC', text)
+    for original, replacement in _SPEECH_REPLACEMENTS.items():
+        text = text.replace(original, replacement)
+    return ' '.join(text.split())
+
+
+def split_sentences(text, min_chars=20, max_chars=300):
+    """
+    Split text into sentences for incremental synthesis.
+
+    Very short sentences ("Great." / "Okay!") are merged with the next one,
+    since Chatterbox produces unnatural prosody on tiny fragments, and
+    sentences longer than `max_chars` are broken at clause boundaries.
+    """
+    text = ' '.join(text.split())
+    if not text:
+        return []
+
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) > max_chars:
+            sentences.extend(_split_long(sentence, max_chars))
+        else:
+            sentences.append(sentence)
+
+    merged = []
+    carry = ''
+    for sentence in sentences:
+        sentence = f'{carry} {sentence}'.strip() if carry else sentence
+        if len(sentence) < min_chars:
+            carry = sentence
+            continue
+        merged.append(sentence)
+        carry = ''
+    if carry:
+        if merged:
+            merged[-1] = f'{merged[-1]} {carry}'
+        else:
+            merged.append(carry)
+    return merged
+
+
+def _split_long(sentence, max_chars):
+    """Break a long sentence at commas/semicolons, falling back to word boundaries."""
+    parts = []
+    current = ''
+    for clause in _CLAUSE_END.split(sentence):
+        candidate = f'{current} {clause}'.strip()
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        while len(clause) > max_chars:
+            cut = clause.rfind(' ', 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            parts.append(clause[:cut].strip())
+            clause = clause[cut:].strip()
+        current = clause
+    if current:
+        parts.append(current)
+    return parts
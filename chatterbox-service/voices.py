@@ -0,0 +1,85 @@
+"""
+Voice-conditioning cache for the Chatterbox TTS Service
+
+Passing `audio_prompt_path` to `generate` makes Chatterbox reload the
+reference clip and re-encode it into speaker conditioning on every call. We
+only use a handful of interviewer voices, so the conditioning is computed
+once per reference file (keyed by model, path, mtime and size so an edited
+file is re-encoded) and reused by swapping it into `model.conds`.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class VoiceConditioningCache:
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> {"conds", "path", "encodeTime"}
+        self._names = {}  # registered voice name -> reference path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_key, path):
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        return (model_key, real_path, stat.st_mtime_ns, stat.st_size)
+
+    def get(self, model, model_key, path, exaggeration=0.5):
+        """
+        Return cached conditioning for `path`, encoding it with `model` on a
+        miss. Callers must hold the model lock: encoding replaces `model.conds`.
+        """
+        key = self.key(model_key, path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["conds"]
+            self.misses += 1
+
+        start = time.perf_counter()
+        model.prepare_conditionals(path, exaggeration=exaggeration)
+        encode_time = time.perf_counter() - start
+        print(f"🎤 Encoded voice reference {path} in {encode_time:.2f}s")
+
+        with self._lock:
+            self._entries[key] = {"conds": model.conds, "path": key[1], "encodeTime": encode_time}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return model.conds
+
+    def register(self, name, path):
+        """Give a reference file a short name clients can pass as 'voice'."""
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Voice reference not found: {path}")
+        with self._lock:
+            self._names[name] = path
+
+    def resolve(self, name):
+        return self._names.get(name)
+
+    def voices(self):
+        with self._lock:
+            return dict(self._names)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+                "cached": [
+                    {"path": entry["path"], "encodeTimeSeconds": round(entry["encodeTime"], 2)}
+                    for entry in self._entries.values()
+                ],
+            }
@@ -3,6 +3,7 @@ import InterviewResult from "../models/InterviewResult.model.js";
 import Resume from "../models/Resume.model.js";
 import * as interviewService from "../services/interview.service.js";
 import * as interviewStateManager from "../services/interview-state.service.js";
+import * as chatterboxService from "../services/chatterbox.service.js";
 import axios from "axios";
 import FormData from "form-data";
 
@@ -11,6 +12,24 @@ import FormData from "form-data";
  * Handles all interview-related API endpoints
  */
 
+/**
+ * Start synthesizing a question's audio in the background so it is ready
+ * (cached by the TTS service) when the client asks for it. Fire-and-forget:
+ * failures only mean the client waits for on-demand synthesis as before.
+ */
+const prefetchQuestionAudio = (session, questionText) => {
+  if (session.mode === "text" || !questionText) return;
+
+  chatterboxService
+    .prefetchSpeech([questionText], {
+      voiceRef: process.env.DEFAULT_VOICE_REF,
+      language: "en",
+    })
+    .catch((error) => {
+      console.warn("⚠️ TTS prefetch skipped:", error.message);
+    });
+};
+
 /**
  * Get interview configuration options
  * GET /api/interview/config
@@ -242,6 +261,7 @@ export const startSession = async (req, res) => {
       category: questionData.category,
       difficulty: questionData.difficulty,
     });
+    prefetchQuestionAudio(session, questionData.question);
 
     await session.save();
 
@@ -387,6 +407,7 @@ export const submitAnswer = async (req, res) => {
           isFollowUp: true,
           parentQuestionNumber: questionNumber,
         });
+        prefetchQuestionAudio(session, followUpData.question);
 
         nextQuestion = {
           number: session.questions.length,
@@ -438,6 +459,7 @@ export const submitAnswer = async (req, res) => {
           category: questionData.category,
           difficulty: questionData.difficulty,
         });
+        prefetchQuestionAudio(session, questionData.question);
 
         nextQuestion = {
           number: session.questions.length,
@@ -561,6 +583,7 @@ export const skipQuestion = async (req, res) => {
         category: questionData.category,
         difficulty: questionData.difficulty,
       });
+      prefetchQuestionAudio(session, questionData.question);
 
       nextQuestion = {
         number: session.questions.length,
@@ -1050,6 +1073,8 @@ export const submitVoiceAnswer = async (req, res) => {
       filename: audioFile.originalname,
       contentType: audioFile.mimetype,
     });
+    // Lets the voice service reuse the language detected on earlier answers
+    formData.append("sessionId", String(sessionId));
 
     console.log("  - FormData headers:", formData.getHeaders());
 
@@ -1199,6 +1224,7 @@ export const submitVoiceAnswer = async (req, res) => {
         category: questionData.category,
         difficulty: questionData.difficulty,
       });
+      prefetchQuestionAudio(session, questionData.question);
 
       nextQuestion = {
         number: session.questions.length,
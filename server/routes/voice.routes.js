@@ -203,14 +203,15 @@ router.post("/tts/synthesize", authenticateToken, async (req, res) => {
 
       if (chatterboxAvailable) {
         console.log("🎙️ Using Chatterbox TTS (open-source)");
-        const audioBuffer = await chatterboxService.textToSpeech(text, {
-          voiceRef: voiceRef || process.env.DEFAULT_VOICE_REF,
-          language: "en",
-        });
+        const { audio: audioBuffer, contentType } =
+          await chatterboxService.synthesize(text, {
+            voiceRef: voiceRef || process.env.DEFAULT_VOICE_REF,
+            language: "en",
+          });
 
-        // Send as binary audio stream (WAV format from Chatterbox)
+        // Send as binary audio (MP3 by default, see CHATTERBOX_AUDIO_FORMAT)
         res.set({
-          "Content-Type": "audio/wav",
+          "Content-Type": contentType,
           "Content-Length": audioBuffer.length,
           "Cache-Control": "no-cache",
           "X-TTS-Provider": "chatterbox",
@@ -264,13 +264,17 @@ async function checkVoiceServices() {
   }
 
   try {
-    const response = await fetch(`${chatterboxUrl}/health`, {
+    const response = await fetch(`${chatterboxUrl}/health/ready`, {
       signal: AbortSignal.timeout(3000),
     });
     const data = await response.json().catch(() => ({}));
 
-    if (response.ok && data.chatterbox_available === true) {
+    if (response.ok && data.ready === true) {
       console.log("✅ Chatterbox TTS service: available on", chatterboxUrl);
+    } else if (data.status === "loading" || data.status === "starting") {
+      console.log(
+        `⏳ Chatterbox TTS service on ${chatterboxUrl} is still loading its model (Browser TTS until it is ready)`
+      );
     } else {
       console.warn(
         `⚠️  Chatterbox TTS service reachable on ${chatterboxUrl}, but model is not loaded (Browser TTS will be used as fallback)`
@@ -7,6 +7,9 @@
 
 const CHATTERBOX_SERVICE_URL =
   process.env.CHATTERBOX_SERVICE_URL || "http://127.0.0.1:5002";
+// Compressed output keeps responses small; set to "wav" for uncompressed audio
+const CHATTERBOX_AUDIO_FORMAT = process.env.CHATTERBOX_AUDIO_FORMAT || "mp3";
+const CHATTERBOX_AUDIO_BITRATE = process.env.CHATTERBOX_AUDIO_BITRATE || null;
 let lastAvailabilityLogKey = null;
 
 function getFetchErrorMessage(error) {
@@ -27,10 +30,11 @@ function logUnavailableOnce(error) {
 
 /**
  * Check if Chatterbox TTS service is available
+ * (readiness: false while the model is still loading, after a failed load, or while draining)
  */
 export async function isAvailable() {
   try {
-    const response = await fetch(`${CHATTERBOX_SERVICE_URL}/health`, {
+    const response = await fetch(`${CHATTERBOX_SERVICE_URL}/health/ready`, {
       method: "GET",
       signal: AbortSignal.timeout(5000), // 5 second timeout
     });
@@ -40,7 +44,7 @@ export async function isAvailable() {
     }
 
     const data = await response.json();
-    return data.status === "healthy" && data.chatterbox_available === true;
+    return data.ready === true;
   } catch (error) {
     logUnavailableOnce(error);
     return false;
@@ -66,6 +70,63 @@ export async function getHealth() {
   }
 }
 
+/**
+ * Request fields shared by synthesis and prefetch calls. Both must produce
+ * the same fields for prefetched audio to be served from the service cache.
+ */
+function buildSynthesisOptions(options = {}) {
+  const body = {
+    format: options.format || CHATTERBOX_AUDIO_FORMAT,
+  };
+
+  const bitrate = options.bitrate || CHATTERBOX_AUDIO_BITRATE;
+  if (bitrate) {
+    body.bitrate = bitrate;
+  }
+
+  // Add optional voice reference for cloning
+  if (options.voiceRef) {
+    body.audio_prompt_path = options.voiceRef;
+  }
+
+  // Add language for multilingual model
+  if (options.language) {
+    body.language = options.language;
+  }
+
+  return body;
+}
+
+/**
+ * Split text the way the interview page does before requesting speech
+ * (sentences, grouped up to ~130 characters), so prefetched chunks match
+ * the requests it makes later.
+ */
+export function splitSpeechIntoChunks(text) {
+  const sentences = text
+    .split(/(?<=[.!?])\s+/)
+    .map((sentence) => sentence.trim())
+    .filter(Boolean);
+
+  if (sentences.length <= 1) return [text.trim()];
+
+  const chunks = [];
+  let currentChunk = "";
+
+  sentences.forEach((sentence) => {
+    const nextChunk = currentChunk ? `${currentChunk} ${sentence}` : sentence;
+    if (nextChunk.length > 130 && currentChunk) {
+      chunks.push(currentChunk);
+      currentChunk = sentence;
+    } else {
+      currentChunk = nextChunk;
+    }
+  });
+
+  if (currentChunk) chunks.push(currentChunk);
+  return chunks;
+}
+
 /**
  * Synthesize speech from text using Chatterbox TTS
  *
@@ -73,9 +134,11 @@ export async function getHealth() {
  * @param {Object} options - Synthesis options
  * @param {string} options.voiceRef - Path to reference audio for voice cloning (optional)
  * @param {string} options.language - Language code (for multilingual model, e.g., 'en', 'fr', 'es')
- * @returns {Promise<Buffer>} Audio buffer (WAV format)
+ * @param {string} options.format - Output format: mp3, opus, ogg or wav (default: CHATTERBOX_AUDIO_FORMAT)
+ * @param {string} options.bitrate - Bitrate for compressed formats, e.g. '64k' (optional)
+ * @returns {Promise<{audio: Buffer, contentType: string}>} Audio buffer and its MIME type
  */
-export async function textToSpeech(text, options = {}) {
+export async function synthesize(text, options = {}) {
   try {
     if (!text || typeof text !== "string") {
       throw new Error("Text is required and must be a string");
@@ -89,18 +152,9 @@ export async function textToSpeech(text, options = {}) {
 
     const requestBody = {
       text: text.trim(),
+      ...buildSynthesisOptions(options),
     };
 
-    // Add optional voice reference for cloning
-    if (options.voiceRef) {
-      requestBody.audio_prompt_path = options.voiceRef;
-    }
-
-    // Add language for multilingual model
-    if (options.language) {
-      requestBody.language = options.language;
-    }
-
     const response = await fetch(`${CHATTERBOX_SERVICE_URL}/tts/synthesize`, {
       method: "POST",
       headers: {
@@ -120,17 +174,98 @@ export async function textToSpeech(text, options = {}) {
     }
 
     // Get audio as buffer
-    const audioBuffer = Buffer.from(await response.arrayBuffer());
+    const audio = Buffer.from(await response.arrayBuffer());
+    const contentType = response.headers.get("content-type") || "audio/wav";
 
-    console.log(`✅ Chatterbox TTS: Generated ${audioBuffer.length} bytes`);
+    console.log(
+      `✅ Chatterbox TTS: Generated ${audio.length} bytes (${contentType})`
+    );
 
-    return audioBuffer;
+    return { audio, contentType };
   } catch (error) {
     console.error("❌ Chatterbox TTS error:", error.message);
     throw error;
   }
 }
 
+/**
+ * Synthesize speech and return only the audio buffer
+ *
+ * @param {string} text - Text to synthesize
+ * @param {Object} options - Same options as synthesize
+ * @returns {Promise<Buffer>} Audio buffer (CHATTERBOX_AUDIO_FORMAT unless options.format is set)
+ */
+export async function textToSpeech(text, options = {}) {
+  const { audio } = await synthesize(text, options);
+  return audio;
+}
+
+/**
+ * Queue texts for background synthesis (low priority)
+ *
+ * Live synthesis requests always run first. Finished audio is cached by the
+ * service, so a later textToSpeech call for the same text returns at once.
+ *
+ * @param {string[]} texts - Texts to synthesize, e.g. upcoming interview questions
+ * @param {Object} options - Same options as synthesize
+ * @returns {Promise<Object>} Job info ({ jobId, status, items })
+ */
+export async function prefetchSpeech(texts, options = {}) {
+  const chunks = texts
+    .filter((text) => typeof text === "string" && text.trim())
+    .flatMap((text) => splitSpeechIntoChunks(text));
+
+  if (chunks.length === 0) {
+    throw new Error("No text to prefetch");
+  }
+
+  const response = await fetch(`${CHATTERBOX_SERVICE_URL}/tts/jobs`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+    },
+    body: JSON.stringify({
+      texts: chunks,
+      priority: "prefetch",
+      ...buildSynthesisOptions(options),
+    }),
+    signal: AbortSignal.timeout(5000),
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({}));
+    throw new Error(
+      `Chatterbox prefetch error: ${response.status} - ${
+        errorData.error || response.statusText
+      }`
+    );
+  }
+
+  const job = await response.json();
+  console.log(
+    `📋 Chatterbox TTS: Prefetching ${chunks.length} chunk(s) (job ${job.jobId})`
+  );
+  return job;
+}
+
+/**
+ * Get status of a prefetch job
+ *
+ * @param {string} jobId - Job id returned by prefetchSpeech
+ * @returns {Promise<Object>} Job info with per-item status
+ */
+export async function getPrefetchJob(jobId) {
+  const response = await fetch(`${CHATTERBOX_SERVICE_URL}/tts/jobs/${jobId}`, {
+    signal: AbortSignal.timeout(5000),
+  });
+
+  if (!response.ok) {
+    throw new Error(`Failed to get prefetch job: ${response.status}`);
+  }
+
+  return await response.json();
+}
+
 /**
  * Get available voices information
  */
@@ -173,7 +308,11 @@ export async function testSynthesis() {
 export default {
   isAvailable,
   getHealth,
+  synthesize,
   textToSpeech,
+  prefetchSpeech,
+  getPrefetchJob,
+  splitSpeechIntoChunks,
   getVoices,
   testSynthesis,
 };
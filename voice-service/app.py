@@ -5,53 +5,606 @@ This service provides voice-to-text transcription using OpenAI Whisper
 for the AI Interview feature in SmartNShine.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
 import os
-import tempfile
+import gc
+import sys
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from audio_io import (
+    decode_audio, probe_duration, decoded_duration, is_silent, AudioDecodeError
+)
+from batching import TranscriptionBatcher, QueueFullError
+from backends import ModelPool
+from vad import trim_to_speech
+from cache import TranscriptionCache, LRUCache
+from streaming import StreamingTranscriber
+from metrics import MetricsRegistry, StageTimer, rss_bytes, timed
+from startup import Startup
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for Node.js backend
 
+# WebSocket support for streaming transcription (optional)
+sock = None
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+    sock = Sock(app)
+except ImportError:
+    print("⚠️ flask-sock not installed. Streaming transcription will be disabled.")
+    print("   To enable: pip install flask-sock")
+
+# ============================================
+# METRICS (GET /metrics, Prometheus text format)
+# ============================================
+
+# Pre-forked workers share their metrics through snapshot files in this directory
+metrics = MetricsRegistry(snapshot_dir=os.environ.get('METRICS_DIR') or None)
+request_seconds = metrics.histogram(
+    'voice_request_duration_seconds', 'Request time including the response write', ('endpoint', 'status')
+)
+stage_seconds = metrics.histogram(
+    'voice_stage_duration_seconds', 'Time per request stage', ('endpoint', 'stage')
+)
+queue_wait_seconds = metrics.histogram('voice_queue_wait_seconds', 'Time a job waited for the model')
+batch_seconds = metrics.histogram('voice_batch_inference_seconds', 'Model time per batched pass')
+batch_size = metrics.histogram('voice_batch_size', 'Jobs per batched pass', buckets=(1, 2, 4, 8, 16, 32))
+model_load_seconds = metrics.histogram(
+    'voice_model_load_seconds', 'Model load time', ('model',), buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+queue_rejections = metrics.counter('voice_queue_rejections_total', 'Requests rejected with 429 (queue full)')
+
+# Ask for a stage breakdown with `X-Profile: 1`; it comes back as `Server-Timing`
+PROFILE_HEADER_ENABLED = os.environ.get('PROFILE_HEADER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def torch_threads():
+    torch = sys.modules.get('torch')  # only if a backend already imported it
+    return torch.get_num_threads() if torch is not None else None
+
+
+metrics.gauge('voice_process_resident_memory_bytes', 'Resident memory of the worker process', rss_bytes)
+metrics.gauge('voice_torch_threads', 'torch intra-op threads', torch_threads)
+metrics.gauge(
+    'voice_queue_outstanding', 'Transcriptions queued or running',
+    lambda: transcription_batcher.stats()["outstanding"] if transcription_batcher else 0
+)
+metrics.gauge(
+    'voice_models_memory_bytes', 'Memory held by resident models',
+    lambda: int(model_pool.stats()["memoryUsedMb"] * 1024 * 1024)
+)
+
+
+@app.before_request
+def start_stage_timer():
+    g.timer = StageTimer()
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    timer = g.get('timer')
+    if timer is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    if PROFILE_HEADER_ENABLED and request.headers.get('X-Profile') == '1':
+        response.headers['Server-Timing'] = timer.server_timing(total=time.perf_counter() - g.started)
+
+    # Observed once the body has been written; `write` is the time from here to the last byte
+    started, handed_over, status = g.started, time.perf_counter(), str(response.status_code)
+
+    def observe():
+        finished = time.perf_counter()
+        timer.add('write', finished - handed_over)
+        timer.observe(stage_seconds, endpoint=endpoint)
+        request_seconds.observe(finished - started, endpoint=endpoint, status=status)
+
+    response.call_on_close(observe)
+    return response
+
 # ============================================
 # VOICE TRANSCRIPTION (Whisper)
 # ============================================
 
-whisper_model = None
+whisper_available = False
 WHISPER_MODEL_SIZE = os.environ.get('WHISPER_MODEL_SIZE', 'base')
+TRANSCRIPTION_BACKEND = os.environ.get('TRANSCRIPTION_BACKEND', 'whisper')  # whisper or faster-whisper
 
-try:
-    import whisper
+# Model routing: short answers go to a small model, larger ones only on request
+WHISPER_SHORT_MODEL_SIZE = os.environ.get('WHISPER_SHORT_MODEL_SIZE', 'tiny')
+SHORT_ANSWER_SECONDS = float(os.environ.get('SHORT_ANSWER_SECONDS', '10'))
+WHISPER_ALLOWED_MODELS = [
+    size.strip() for size in os.environ.get('WHISPER_ALLOWED_MODELS', 'tiny,base,small').split(',') if size.strip()
+]
+WHISPER_MEMORY_BUDGET_MB = int(os.environ.get('WHISPER_MEMORY_BUDGET_MB', '2048'))
+model_pool = ModelPool(
+    TRANSCRIPTION_BACKEND,
+    WHISPER_MEMORY_BUDGET_MB,
+    on_load=lambda model_size, seconds: model_load_seconds.observe(seconds, model=model_size)
+)
+MAX_DURATION_SECONDS = 90  # Interview answer limit
+
+# Micro-batching: requests arriving within the window share one model pass
+BATCH_WINDOW_MS = int(os.environ.get('WHISPER_BATCH_WINDOW_MS', '30'))
+MAX_BATCH_SIZE = int(os.environ.get('WHISPER_MAX_BATCH_SIZE', '8'))
+QUEUE_MAX_DEPTH = int(os.environ.get('WHISPER_QUEUE_MAX_DEPTH', '32'))  # queued + running, then 429
+transcription_batcher = None
+
+# torch intra-op threads used by inference (unset: torch's default, one per core)
+TORCH_NUM_THREADS = int(os.environ.get('TORCH_NUM_THREADS', '0'))
+
+# Optional voice-activity detection: transcribe only the speech spans
+VAD_ENABLED = os.environ.get('VAD_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+VAD_MIN_SILENCE_MS = int(os.environ.get('VAD_MIN_SILENCE_MS', '600'))
+VAD_PAD_MS = int(os.environ.get('VAD_PAD_MS', '200'))
+
+# Bulk endpoint: files per request and parallel decode threads
+BATCH_MAX_ITEMS = int(os.environ.get('TRANSCRIBE_BATCH_MAX_ITEMS', '20'))
+BATCH_DECODE_WORKERS = int(os.environ.get('TRANSCRIBE_BATCH_DECODE_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Streaming: re-transcribe the live window every STEP seconds
+STREAM_STEP_SECONDS = float(os.environ.get('STREAM_STEP_SECONDS', '1.0'))
+STREAM_WINDOW_SECONDS = float(os.environ.get('STREAM_WINDOW_SECONDS', '20'))
+
+# Result cache: identical uploads (client retries) skip inference entirely
+transcription_cache = TranscriptionCache(
+    max_entries=int(os.environ.get('TRANSCRIPTION_CACHE_SIZE', '256')),
+    disk_dir=os.environ.get('TRANSCRIPTION_CACHE_DIR') or None,
+    disk_ttl=int(os.environ.get('TRANSCRIPTION_CACHE_TTL', '86400')),
+    disk_max_bytes=int(os.environ.get('TRANSCRIPTION_CACHE_MAX_MB', '200')) * 1024 * 1024
+)
+
+# Session language pinning: the language detected on a session's first answer
+# is reused as the hint for its later answers, skipping detection
+session_languages = LRUCache(
+    max_entries=int(os.environ.get('SESSION_LANGUAGE_CACHE_SIZE', '1000')),
+    ttl=int(os.environ.get('SESSION_LANGUAGE_TTL', '7200'))
+)
+
+
+def run_model_batch(jobs):
+    """Scheduler callback: run each model's share of the batch on that model"""
+    results = [None] * len(jobs)
+    for model_size in {model or WHISPER_MODEL_SIZE for _, _, model in jobs}:
+        indexes = [i for i, job in enumerate(jobs) if (job[2] or WHISPER_MODEL_SIZE) == model_size]
+        try:
+            backend = model_pool.get(model_size)
+            model_results = backend.transcribe_batch([(jobs[i][0], jobs[i][1]) for i in indexes])
+        except Exception as e:
+            # A model that fails to load only fails its own requests
+            model_results = [e] * len(indexes)
+        for i, result in zip(indexes, model_results):
+            results[i] = result if isinstance(result, Exception) else dict(result, model=model_size)
+    return results
+
+
+def resolve_model(requested, duration):
+    """Pick the model size for one answer: explicit request, else by duration"""
+    if requested:
+        return requested
+    if WHISPER_SHORT_MODEL_SIZE and duration <= SHORT_ANSWER_SECONDS:
+        return WHISPER_SHORT_MODEL_SIZE
+    return WHISPER_MODEL_SIZE
+
+
+def observe_batch(size, queue_waits, seconds):
+    """Scheduler callback: export queue wait and model time"""
+    batch_size.observe(size)
+    batch_seconds.observe(seconds)
+    for wait in queue_waits:
+        queue_wait_seconds.observe(wait)
+
+
+def start_batcher():
+    """(Re)create the scheduler; its worker thread belongs to the calling process"""
+    global transcription_batcher
+    transcription_batcher = TranscriptionBatcher(
+        run_model_batch,
+        window_ms=BATCH_WINDOW_MS,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_depth=QUEUE_MAX_DEPTH,
+        on_batch=observe_batch
+    )
+
+
+# ============================================
+# STARTUP (background model loading, see startup.py)
+# ============================================
+
+startup = Startup()
+
+
+def set_torch_threads(num_threads):
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def startup_models():
+    """The default model plus the short-answer model, if routing uses one"""
+    return list(dict.fromkeys(filter(None, [WHISPER_MODEL_SIZE, WHISPER_SHORT_MODEL_SIZE])))
+
+
+def warmup_model(model_size):
+    """One dummy inference, so one-off allocations happen before real requests"""
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(16000) * 0.01).astype(np.float32)
+    model_pool.get(model_size).transcribe(audio, language='en')
+
+
+def load_models():
+    """Import the backend, then load and warm every routed model; other sizes load on first use"""
+    global whisper_available
+    if TORCH_NUM_THREADS:
+        set_torch_threads(TORCH_NUM_THREADS)
+    for model_size in startup_models():
+        with startup.step(f"load:{model_size}"):
+            try:
+                model_pool.get(model_size)
+            except ImportError as e:
+                print("   To enable: pip install openai-whisper (or faster-whisper)")
+                raise RuntimeError(f"{TRANSCRIPTION_BACKEND} backend not installed ({e})")
+        with startup.step(f"warmup:{model_size}"):
+            warmup_model(model_size)
+    start_batcher()
+    whisper_available = True
+
+
+def unavailable_message():
+    if startup.loading:
+        return "Voice transcription is starting up. Please retry shortly."
+    return "Voice transcription is not available. Whisper model not loaded."
+
+
+def unavailable_response():
+    """503 for transcription requests before the models are ready (Retry-After while loading)"""
+    response = jsonify({
+        "success": False,
+        "error": unavailable_message(),
+        **({"retryAfter": 5} if startup.loading else {})
+    })
+    if startup.loading:
+        response.headers['Retry-After'] = '5'
+    return response, 503
+
+
+# The port is served while this runs; see /health/ready
+startup.run(load_models)
+
+
+# ============================================
+# PRE-FORK WORKERS (see gunicorn.conf.py)
+# ============================================
+
+# Filled in by init_worker() in each forked worker
+worker_info = {"prefork": False, "pid": os.getpid(), "torchThreads": None}
+
+
+def prepare_prefork():
+    """
+    Runs in the gunicorn master before workers are forked: wait for the
+    startup thread to load and warm every model the routing uses, then
+    freeze the heap so the workers share the weight pages copy-on-write.
+    """
+    startup.wait()
+    if not whisper_available:
+        print("⚠️ Whisper not loaded; workers will start without a model")
+        return
+    if TRANSCRIPTION_BACKEND != 'whisper':
+        # CTranslate2 starts its thread pool at load time, and threads don't survive fork()
+        raise RuntimeError(f"Pre-fork workers need the whisper backend, not {TRANSCRIPTION_BACKEND}. Set WEB_WORKERS=1.")
     
-    print(f"🎙️ Loading Whisper model ({WHISPER_MODEL_SIZE})...")
-    whisper_model = whisper.load_model(WHISPER_MODEL_SIZE)
-    print(f"✅ Whisper model loaded successfully!")
-except ImportError:
-    print("⚠️ Whisper not installed. Voice transcription will be disabled.")
-    print("   To enable: pip install openai-whisper")
-except Exception as e:
-    print(f"⚠️ Failed to load Whisper model: {e}")
+    for model_size in startup_models():
+        backend = model_pool.get(model_size)
+        device = getattr(getattr(backend, 'model', None), 'device', None)
+        if device is not None and str(device) != 'cpu':
+            # A CUDA context can't be shared with forked children
+            raise RuntimeError(f"Pre-fork workers need CPU inference, but {model_size} is on {device}. Set WEB_WORKERS=1.")
+    
+    # Keep gc from writing to (and so un-sharing) the pages of objects that exist now
+    gc.collect()
+    gc.freeze()
+
+
+def init_worker(torch_threads=None, preloaded=True):
+    """Runs in each worker: pin its torch threads and, if forked, start its own scheduler"""
+    if torch_threads:
+        set_torch_threads(torch_threads)
+    if preloaded and whisper_available:
+        # The master's scheduler thread was not copied by fork()
+        start_batcher()
+    worker_info.update(prefork=preloaded, pid=os.getpid(), torchThreads=torch_threads)
+    metrics.start_snapshots()
+    print(f"👷 Worker {os.getpid()} ready ({torch_threads or 'default'} torch threads)")
+
+
+# ============================================
+# SERVING (load shedding and graceful drain)
+# ============================================
+
+# Set when the server starts shutting down (see gunicorn.conf.py)
+draining = threading.Event()
+
+
+def begin_drain():
+    """Stop taking new work; requests already running are allowed to finish"""
+    if not draining.is_set():
+        draining.set()
+        print("🛑 Draining: rejecting new requests, finishing in-flight transcriptions")
+
+
+def drain(timeout=30):
+    """Wait for queued transcriptions to finish before the process exits"""
+    begin_drain()
+    if transcription_batcher is not None and not transcription_batcher.wait_idle(timeout):
+        print(f"⚠️ Drain timed out after {timeout}s with transcriptions still queued")
+        return False
+    print("✅ Drained")
+    return True
+
+
+def queue_full_response(retry_after):
+    response = jsonify({
+        "success": False,
+        "error": "Voice transcription is busy. Please retry shortly.",
+        "retryAfter": retry_after
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+
+@app.before_request
+def reject_while_draining():
+    if draining.is_set() and request.path not in ('/health', '/health/live', '/health/ready', '/metrics'):
+        response = jsonify({
+            "success": False,
+            "error": "Voice transcription service is shutting down. Please retry.",
+            "retryAfter": 1
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (503 while draining, so load balancers stop routing here)"""
+    status = "starting" if startup.loading else "healthy"
+    if draining.is_set():
+        status = "draining"
+    return jsonify({
+        "status": status,
+        "whisper_available": whisper_available,
+        "whisper_model": WHISPER_MODEL_SIZE if whisper_available else None,
+        "backend": TRANSCRIPTION_BACKEND if whisper_available else None,
+        "batching": transcription_batcher.stats() if transcription_batcher else None,
+        "vad_enabled": VAD_ENABLED,
+        "cache": transcription_cache.stats(),
+        "sessionLanguages": session_languages.stats(),
+        "worker": worker_info,
+        "startup": startup.status(),
+        "service": "Voice Transcription Service"
+    }), 503 if draining.is_set() else 200
+
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness: the process is up and serving requests, whether or not models are loaded"""
     return jsonify({
-        "status": "healthy",
-        "whisper_available": whisper_model is not None,
-        "whisper_model": WHISPER_MODEL_SIZE if whisper_model else None,
+        "status": "alive",
+        "uptimeSeconds": startup.status()["uptimeSeconds"],
         "service": "Voice Transcription Service"
     })
 
 
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the models are loaded and warmed up; 503 while loading, failed or draining"""
+    ready = startup.ready and whisper_available and not draining.is_set()
+    return jsonify({
+        **startup.status(),
+        "status": "draining" if draining.is_set() else startup.state,
+        "ready": ready,
+        "models": startup_models(),
+        "service": "Voice Transcription Service"
+    }), 200 if ready else 503
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics (summed across pre-forked workers)"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+class TranscriptionError(Exception):
+    """A client-facing failure for one upload, with the HTTP status to return"""
+    
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def duration_limit_error():
+    """Error for answers longer than the interview limit"""
+    return TranscriptionError(
+        f"Audio duration exceeds {MAX_DURATION_SECONDS} seconds limit for interview answers."
+    )
+
+
+def read_upload(audio_file):
+    """Validate an uploaded file and read it into memory. Returns (bytes, extension)."""
+    print(f"📁 Received file: {audio_file.filename}, content_type: {audio_file.content_type}")
+    
+    if audio_file.filename == '':
+        raise TranscriptionError("Empty filename")
+    
+    # Validate file extension (allow empty extension for streams)
+    allowed_extensions = {'wav', 'mp3', 'm4a', 'webm', 'ogg', 'flac', ''}
+    file_ext = audio_file.filename.rsplit('.', 1)[-1].lower() if '.' in audio_file.filename else ''
+    
+    # Also check content type for webm
+    is_webm = 'webm' in (audio_file.content_type or '')
+    
+    if file_ext not in allowed_extensions and not is_webm:
+        print(f"❌ Invalid extension: {file_ext}, content_type: {audio_file.content_type}")
+        raise TranscriptionError("Unsupported audio format. Allowed: wav, mp3, m4a, webm, ogg, flac")
+    
+    # Read upload into memory and check size (max 10MB)
+    audio_bytes = audio_file.read()
+    
+    max_size = 10 * 1024 * 1024  # 10MB
+    if len(audio_bytes) > max_size:
+        raise TranscriptionError("Audio file too large. Maximum size is 10MB.")
+    
+    return audio_bytes, file_ext
+
+
+def validate_model_request(requested):
+    """Reject explicit model sizes this deployment doesn't allow"""
+    if requested and requested not in WHISPER_ALLOWED_MODELS:
+        raise TranscriptionError(
+            f"Unsupported model '{requested}'. Allowed: {', '.join(WHISPER_ALLOWED_MODELS)}"
+        )
+    return requested or None
+
+
+def prepare_upload(audio_bytes, file_ext, language_hint, model_request=None, session_id=None, timer=None):
+    """
+    Everything that happens before inference: cache lookup, duration probe,
+    decode, limit/silence checks, VAD, model routing and session language
+    pinning. Stage times go to `timer`, if given.
+    
+    Returns a job dict. If `job["data"]` is already set (cache hit or no
+    speech) the answer needs no inference; otherwise `job["audio"]` is ready
+    to be transcribed and passed to finish_transcription().
+    """
+    # 'auto' resolves through the routing config, which can change between restarts
+    model_setting = model_request or f"auto:{WHISPER_MODEL_SIZE}:{WHISPER_SHORT_MODEL_SIZE}:{SHORT_ANSWER_SECONDS}"
+    job = {
+        "cacheKey": TranscriptionCache.key(
+            audio_bytes, TRANSCRIPTION_BACKEND, model_setting, language_hint, VAD_ENABLED
+        ),
+        "language": language_hint,
+        "sessionId": session_id,
+        "model": None,
+        "audio": None,
+        "duration": 0,
+        "speechMap": None,
+        "data": None
+    }
+    
+    # Retries of the same upload return the stored result
+    with timed(timer, 'cache'):
+        cached = transcription_cache.get(job["cacheKey"])
+    if cached is not None:
+        print("⚡ Cache hit, skipping transcription")
+        job["data"] = cached
+        return job
+    
+    # Reject over-limit answers from the container header before decoding
+    with timed(timer, 'probe'):
+        probed_duration = probe_duration(audio_bytes, file_ext)
+    if probed_duration is not None and probed_duration > MAX_DURATION_SECONDS:
+        raise duration_limit_error()
+    
+    # Decode to 16 kHz float32 in memory (temp file only as a fallback)
+    try:
+        audio = decode_audio(audio_bytes, file_ext, timer)
+    except AudioDecodeError as e:
+        print(f"❌ Audio decode error: {e}")
+        raise TranscriptionError("Could not decode audio file.")
+    
+    # Decoded sample count is the real duration (headers may be missing or wrong)
+    duration = decoded_duration(audio)
+    if duration > MAX_DURATION_SECONDS:
+        raise duration_limit_error()
+    job["duration"] = duration
+    job["model"] = resolve_model(model_request, duration)
+    
+    # The cache key uses the client's hint so retries still hit; inference
+    # uses the session's pinned language when the client gave none
+    if not language_hint and session_id:
+        job["language"] = session_languages.get(session_id)
+    
+    if VAD_ENABLED:
+        # Drop leading/trailing silence and long pauses before inference
+        with timed(timer, 'vad'):
+            audio, job["speechMap"] = trim_to_speech(
+                audio,
+                min_silence_ms=VAD_MIN_SILENCE_MS,
+                pad_ms=VAD_PAD_MS
+            )
+        if len(audio) == 0:
+            print("🔇 No speech detected, skipping transcription")
+            job["data"] = {
+                "text": "",
+                "language": language_hint or 'unknown',
+                "duration": round(duration, 2),
+                "wordCount": 0,
+                "speechDuration": 0,
+                "segments": []
+            }
+            transcription_cache.put(job["cacheKey"], job["data"])
+            return job
+        print(f"✂️ VAD kept {job['speechMap'].speech_duration:.1f}s of {duration:.1f}s")
+    elif is_silent(audio):
+        raise TranscriptionError("No speech detected. The recording is empty or silent.")
+    
+    job["audio"] = audio
+    return job
+
+
+def finish_transcription(job, result, timer=None):
+    """Build (and cache) the response data for a transcribed job"""
+    if timer is not None and 'timings' in result:
+        # Sub-stages the whisper backend reports; part of `inference`
+        for stage, seconds in result['timings'].items():
+            timer.add(stage, seconds)
+    transcribed_text = result.get('text', '').strip()
+    detected_language = result.get('language', 'unknown')
+    duration = job["duration"]
+    speech_map = job["speechMap"]
+    
+    segments = result.get('segments', [])
+    if speech_map is not None:
+        # Report segment times on the original recording's timeline
+        segments = speech_map.map_segments(segments)
+    
+    print(f"✅ Transcription complete: {len(transcribed_text)} chars, {duration:.1f}s")
+    
+    if job["sessionId"] and not job["language"] and transcribed_text and detected_language != 'unknown':
+        session_languages.put(job["sessionId"], detected_language)
+    
+    job["data"] = {
+        "text": transcribed_text,
+        "language": detected_language,
+        "duration": round(duration, 2),
+        "wordCount": len(transcribed_text.split()) if transcribed_text else 0,
+        "speechDuration": round(speech_map.speech_duration if speech_map else duration, 2),
+        "segments": segments,
+        "model": result.get('model', job["model"])
+    }
+    transcription_cache.put(job["cacheKey"], job["data"])
+    return job["data"]
+
+
 @app.route('/transcribe', methods=['POST'])
 def transcribe_audio():
     """
     Transcribe audio file to text using Whisper
     
     Accepts: multipart/form-data with 'audio' file
+    Optional: 'language' hint, 'model' size (otherwise routed by duration),
+              'sessionId' (later answers reuse the language detected on the first)
     Supported formats: wav, mp3, m4a, webm, ogg, flac
-    Max duration: 90 seconds (interview answer limit)
+    Max duration: 90 seconds (interview answer limit), checked before inference
     
     Response:
     {
@@ -60,105 +613,63 @@ def transcribe_audio():
             "text": "Transcribed text here...",
             "language": "en",
             "duration": 45.2,
-            "wordCount": 120
+            "wordCount": 120,
+            "speechDuration": 38.7,
+            "segments": [{"start": 0.4, "end": 6.1, "text": "..."}],
+            "model": "base"
         }
     }
     """
-    if not whisper_model:
-        return jsonify({
-            "success": False,
-            "error": "Voice transcription is not available. Whisper model not loaded."
-        }), 503
+    if not whisper_available:
+        return unavailable_response()
     
     try:
-        # Check if audio file is present
-        if 'audio' not in request.files:
+        # Check if audio file is present (accessing request.files parses the upload)
+        with g.timer.stage('upload'):
+            has_audio = 'audio' in request.files
+        if not has_audio:
             print(f"❌ No 'audio' field. Available fields: {list(request.files.keys())}")
             return jsonify({
                 "success": False,
                 "error": "No audio file provided. Use 'audio' field in multipart/form-data."
             }), 400
         
-        audio_file = request.files['audio']
-        print(f"📁 Received file: {audio_file.filename}, content_type: {audio_file.content_type}")
+        with g.timer.stage('upload'):
+            audio_file = request.files['audio']
+            model_request = validate_model_request(request.form.get('model'))
+            audio_bytes, file_ext = read_upload(audio_file)
+        job = prepare_upload(
+            audio_bytes,
+            file_ext,
+            request.form.get('language'),
+            model_request,
+            session_id=request.form.get('sessionId'),
+            timer=g.timer
+        )
         
-        if audio_file.filename == '':
-            return jsonify({
-                "success": False,
-                "error": "Empty filename"
-            }), 400
-        
-        # Validate file extension (allow empty extension for streams)
-        allowed_extensions = {'wav', 'mp3', 'm4a', 'webm', 'ogg', 'flac', ''}
-        file_ext = audio_file.filename.rsplit('.', 1)[-1].lower() if '.' in audio_file.filename else ''
-        
-        # Also check content type for webm
-        is_webm = 'webm' in (audio_file.content_type or '')
-        
-        if file_ext not in allowed_extensions and not is_webm:
-            print(f"❌ Invalid extension: {file_ext}, content_type: {audio_file.content_type}")
-            return jsonify({
-                "success": False,
-                "error": f"Unsupported audio format. Allowed: wav, mp3, m4a, webm, ogg, flac"
-            }), 400
-        
-        # Check file size (max 10MB)
-        audio_file.seek(0, 2)  # Seek to end
-        file_size = audio_file.tell()
-        audio_file.seek(0)  # Reset to beginning
-        
-        max_size = 10 * 1024 * 1024  # 10MB
-        if file_size > max_size:
-            return jsonify({
-                "success": False,
-                "error": "Audio file too large. Maximum size is 10MB."
-            }), 400
-        
-        # Save to temporary file
-        with tempfile.NamedTemporaryFile(suffix=f'.{file_ext}', delete=False) as tmp_file:
-            audio_file.save(tmp_file.name)
-            tmp_path = tmp_file.name
-        
-        try:
+        if job["data"] is None:
             # Transcribe with Whisper
-            print(f"🎙️ Transcribing audio file: {audio_file.filename}")
-            result = whisper_model.transcribe(
-                tmp_path,
-                language=request.form.get('language'),  # Optional language hint
-                fp16=False  # Use FP32 for better compatibility
+            print(f"🎙️ Transcribing audio file: {audio_file.filename} (model: {job['model']})")
+            result = transcription_batcher.submit(
+                job["audio"],
+                language=job["language"],  # Optional language hint
+                model=job["model"],
+                timer=g.timer
             )
-            
-            transcribed_text = result.get('text', '').strip()
-            detected_language = result.get('language', 'unknown')
-            
-            # Get audio duration from segments
-            segments = result.get('segments', [])
-            duration = segments[-1]['end'] if segments else 0
-            
-            # Check if duration exceeds limit (90 seconds for interview answers)
-            if duration > 90:
-                return jsonify({
-                    "success": False,
-                    "error": "Audio duration exceeds 90 seconds limit for interview answers."
-                }), 400
-            
-            print(f"✅ Transcription complete: {len(transcribed_text)} chars, {duration:.1f}s")
-            
-            return jsonify({
-                "success": True,
-                "data": {
-                    "text": transcribed_text,
-                    "language": detected_language,
-                    "duration": round(duration, 2),
-                    "wordCount": len(transcribed_text.split()) if transcribed_text else 0
-                }
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-                
+            finish_transcription(job, result, g.timer)
+        
+        with g.timer.stage('serialize'):
+            return jsonify({"success": True, "data": job["data"]})
+    
+    except QueueFullError as e:
+        print(f"⏳ Transcription queue full, retry after {e.retry_after}s")
+        queue_rejections.inc()
+        return queue_full_response(e.retry_after)
+    except TranscriptionError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), e.status_code
     except Exception as e:
         print(f"❌ Transcription error: {e}")
         return jsonify({
@@ -167,15 +678,243 @@ def transcribe_audio():
         }), 500
 
 
+@app.route('/transcribe/batch', methods=['POST'])
+def transcribe_batch():
+    """
+    Transcribe all answers of an interview session in one request
+    
+    Accepts: multipart/form-data with several 'audio' files (same field name)
+    Optional 'language': one value for every file, or one per file in order
+    Optional 'model': one model size for every file (otherwise routed by duration)
+    Optional 'sessionId': reuse/pin the session's detected language
+    
+    Uploads are validated and decoded in parallel, then queued together so the
+    scheduler can transcribe them in as few batched passes as possible. One bad
+    file doesn't fail the request - each item reports its own result or error.
+    
+    Response:
+    {
+        "success": true,
+        "data": {
+            "results": [
+                {"index": 0, "filename": "q1.webm", "success": true, "data": {...}},
+                {"index": 1, "filename": "q2.webm", "success": false, "error": "..."}
+            ],
+            "succeeded": 1,
+            "failed": 1
+        }
+    }
+    """
+    if not whisper_available:
+        return unavailable_response()
+    
+    with g.timer.stage('upload'):
+        audio_files = request.files.getlist('audio')
+    if not audio_files:
+        return jsonify({
+            "success": False,
+            "error": "No audio files provided. Use repeated 'audio' fields in multipart/form-data."
+        }), 400
+    
+    if len(audio_files) > BATCH_MAX_ITEMS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many audio files. Maximum is {BATCH_MAX_ITEMS} per request."
+        }), 400
+    
+    languages = request.form.getlist('language')
+    if len(languages) not in (0, 1, len(audio_files)):
+        return jsonify({
+            "success": False,
+            "error": "Provide one 'language' for all files or one per file."
+        }), 400
+    if len(languages) <= 1:
+        languages = [languages[0] if languages else None] * len(audio_files)
+    
+    try:
+        model_request = validate_model_request(request.form.get('model'))
+    except TranscriptionError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status_code
+    
+    session_id = request.form.get('sessionId')
+    print(f"📦 Batch transcription: {len(audio_files)} files")
+    
+    # Reading must happen on the request thread; decoding can run in parallel
+    uploads = []
+    with g.timer.stage('upload'):
+        for audio_file in audio_files:
+            try:
+                uploads.append(read_upload(audio_file))
+            except TranscriptionError as e:
+                uploads.append(e)
+    
+    # Stage times below are summed over files, so they can exceed wall-clock time
+    timer = g.timer
+    
+    def prepare(index):
+        upload = uploads[index]
+        if isinstance(upload, Exception):
+            return upload
+        try:
+            return prepare_upload(upload[0], upload[1], languages[index], model_request, session_id, timer)
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=BATCH_DECODE_WORKERS) as pool:
+        prepared = list(pool.map(prepare, range(len(audio_files))))
+    
+    # Shed the whole request rather than failing some of its answers
+    needed = sum(1 for job in prepared if isinstance(job, dict) and job["data"] is None)
+    if needed > transcription_batcher.free_slots():
+        retry_after = transcription_batcher.retry_after()
+        print(f"⏳ Transcription queue can't take {needed} answers, retry after {retry_after}s")
+        queue_rejections.inc()
+        return queue_full_response(retry_after)
+    
+    # Queue every answer before waiting on any, so they share batched passes
+    futures = []
+    for index, job in enumerate(prepared):
+        future = None
+        if isinstance(job, dict) and job["data"] is None:
+            try:
+                future = transcription_batcher.submit_async(job["audio"], job["language"], job["model"], timer)
+            except QueueFullError:
+                # Another request took the slots in the meantime
+                prepared[index] = TranscriptionError("Voice transcription is busy. Please retry shortly.", 429)
+        futures.append(future)
+    
+    results = []
+    for index, (audio_file, job, future) in enumerate(zip(audio_files, prepared, futures)):
+        item = {"index": index, "filename": audio_file.filename}
+        try:
+            if isinstance(job, Exception):
+                raise job
+            if future is not None:
+                finish_transcription(job, future.result(), timer)
+            item.update(success=True, data=job["data"])
+        except TranscriptionError as e:
+            item.update(success=False, error=str(e))
+        except Exception as e:
+            print(f"❌ Batch item {index} error: {e}")
+            item.update(success=False, error=f"Transcription failed: {str(e)}")
+        results.append(item)
+    
+    succeeded = sum(1 for item in results if item["success"])
+    print(f"✅ Batch transcription complete: {succeeded}/{len(results)} succeeded")
+    
+    with timer.stage('serialize'):
+        return jsonify({
+            "success": True,
+            "data": {
+                "results": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded
+            }
+        })
+
+
+def transcribe_stream(ws):
+    """
+    Stream audio over a WebSocket and receive partial transcripts
+    
+    Connect: ws://host:5001/transcribe/stream?format=pcm16&language=en&sessionId=abc
+      format: 'pcm16' (raw 16 kHz mono int16, default) or a container
+              extension such as 'webm' / 'ogg' for MediaRecorder chunks
+    
+    Client -> server:
+      binary frames: audio chunks
+      text frame {"type": "stop"}: the candidate finished speaking
+    
+    Server -> client (JSON text frames):
+      {"type": "partial", "text": "...", "duration": 12.0}
+      {"type": "final", "text": "...", "language": "en", "duration": 45.2, "wordCount": 120}
+      {"type": "error", "error": "..."}
+    """
+    if not whisper_available:
+        ws.send(json.dumps({
+            "type": "error",
+            "error": unavailable_message()
+        }))
+        return
+    
+    session_id = request.args.get('sessionId')
+    language = request.args.get('language') or (session_languages.get(session_id) if session_id else None)
+    
+    transcriber = StreamingTranscriber(
+        transcription_batcher.submit,
+        audio_format=request.args.get('format', 'pcm16').lower(),
+        language=language,
+        step_seconds=STREAM_STEP_SECONDS,
+        window_seconds=STREAM_WINDOW_SECONDS,
+        max_duration=MAX_DURATION_SECONDS
+    )
+    print(f"🔴 Streaming transcription started ({transcriber.audio_format})")
+    
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            if isinstance(message, str):
+                if json.loads(message).get('type') == 'stop':
+                    break
+                continue
+            
+            try:
+                partial = transcriber.add_chunk(message)
+            except QueueFullError:
+                # Partials are best-effort; the next step re-transcribes the window
+                partial = None
+            if transcriber.over_limit:
+                ws.send(json.dumps({
+                    "type": "error",
+                    "error": f"Audio duration exceeds {MAX_DURATION_SECONDS} seconds limit for interview answers."
+                }))
+                # No final transcript for audio past the limit
+                return
+            if partial:
+                ws.send(json.dumps(partial))
+        
+        final = transcriber.finish()
+        if session_id and not language and final['text'] and final['language'] != 'unknown':
+            session_languages.put(session_id, final['language'])
+        print(f"✅ Streaming transcription complete: {len(final['text'])} chars, {final['duration']:.1f}s")
+        ws.send(json.dumps(final))
+    except ConnectionClosed:
+        print("🔌 Streaming client disconnected before the final transcript")
+    except QueueFullError as e:
+        ws.send(json.dumps({
+            "type": "error",
+            "error": f"Voice transcription is busy. Please retry in {e.retry_after}s."
+        }))
+    except Exception as e:
+        print(f"❌ Streaming transcription error: {e}")
+        ws.send(json.dumps({"type": "error", "error": f"Transcription failed: {str(e)}"}))
+
+
+if sock is not None:
+    sock.route('/transcribe/stream')(transcribe_stream)
+
+
 @app.route('/transcribe/health', methods=['GET'])
 def transcribe_health():
     """Check if voice transcription is available"""
     return jsonify({
-        "available": whisper_model is not None,
-        "model": WHISPER_MODEL_SIZE if whisper_model else None,
-        "maxDuration": 90,
+        "available": whisper_available,
+        "starting": startup.loading,
+        "model": WHISPER_MODEL_SIZE if whisper_available else None,
+        "backend": TRANSCRIPTION_BACKEND if whisper_available else None,
+        "maxDuration": MAX_DURATION_SECONDS,
         "maxFileSize": "10MB",
-        "supportedFormats": ["wav", "mp3", "m4a", "webm", "ogg", "flac"]
+        "supportedFormats": ["wav", "mp3", "m4a", "webm", "ogg", "flac"],
+        "streaming": sock is not None,
+        "allowedModels": WHISPER_ALLOWED_MODELS,
+        "routing": {
+            "shortAnswerModel": WHISPER_SHORT_MODEL_SIZE or None,
+            "shortAnswerSeconds": SHORT_ANSWER_SECONDS,
+            "defaultModel": WHISPER_MODEL_SIZE
+        },
+        "models": model_pool.stats()
     })
 
 
@@ -183,8 +922,10 @@ if __name__ == '__main__':
     print("\n" + "="*60)
     print("🎙️ Voice Transcription Service for AI Interview")
     print("="*60)
-    print(f"Whisper model: {'✅ ' + WHISPER_MODEL_SIZE if whisper_model else '❌ Not loaded'}")
-    print("\n📡 Starting Flask server on http://localhost:5001")
+    print(f"Whisper model: {'✅ ' + WHISPER_MODEL_SIZE if whisper_available else '⏳ ' + WHISPER_MODEL_SIZE + ' loading in background (see /health/ready)'}")
+    print(f"Backend: {TRANSCRIPTION_BACKEND}")
+    print("\n📡 Starting Flask development server on http://localhost:5001")
+    print("   For production: gunicorn -c gunicorn.conf.py app:app")
     print("="*60 + "\n")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    app.run(host='0.0.0.0', port=5001, debug=os.environ.get('FLASK_DEBUG', 'false').lower() in ('1', 'true', 'yes'))
@@ -0,0 +1,260 @@
+"""
+In-memory audio decoding for the Voice Transcription Service
+
+Uploaded answers are turned into the 16 kHz mono float32 array that Whisper
+expects without touching disk whenever possible:
+
+1. 16 kHz WAV (and FLAC, when `soundfile` is installed) is decoded natively
+   in Python.
+2. Everything else, including WAV/FLAC at other rates, is streamed through
+   ffmpeg's stdin/stdout, whose resampler is properly anti-aliased.
+3. Containers that ffmpeg cannot read from a pipe (mp4/m4a keep their index
+   at the end of the file) fall back to a temporary file.
+"""
+
+import io
+import os
+import struct
+import subprocess
+import tempfile
+import wave
+
+import numpy as np
+
+from metrics import timed
+
+SAMPLE_RATE = 16000  # Whisper's native sample rate
+
+# mp4-family containers usually store the 'moov' atom at the end of the file,
+# which ffmpeg can't seek to when reading from stdin.
+UNPIPEABLE_EXTENSIONS = {'m4a', 'mp4', 'mov'}
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+
+# Peak level below which a decoded answer is treated as silence (-50 dBFS)
+SILENCE_PEAK_THRESHOLD = 10 ** (-50 / 20)
+
+
+class AudioDecodeError(Exception):
+    """Raised when uploaded audio cannot be decoded by any available path."""
+
+
+def probe_duration(data, file_ext=''):
+    """
+    Cheaply estimate the duration (seconds) of uploaded audio without decoding it.
+
+    Reads WAV/FLAC headers directly and asks ffprobe about other containers.
+    Returns None when the container doesn't record a duration (e.g. webm from
+    MediaRecorder), in which case callers should fall back to the decoded
+    sample count.
+    """
+    if not data:
+        return 0.0
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return _probe_wav(data)
+    if data[:4] == b'fLaC':
+        return _probe_flac(data)
+    if (file_ext or '').lower() in UNPIPEABLE_EXTENSIONS:
+        return None
+    return _probe_ffprobe(data)
+
+
+def decoded_duration(audio):
+    """Exact duration (seconds) of a decoded SAMPLE_RATE array."""
+    return len(audio) / SAMPLE_RATE
+
+
+def is_silent(audio, threshold=SILENCE_PEAK_THRESHOLD):
+    """True if the decoded audio is empty or never rises above the threshold."""
+    return len(audio) == 0 or float(np.max(np.abs(audio))) < threshold
+
+
+def _probe_wav(data):
+    """Walk the RIFF chunks for 'fmt ' byte rate and 'data' size."""
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', data[offset + 4:offset + 8])[0]
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            byte_rate = struct.unpack('<I', data[offset + 16:offset + 20])[0]
+        elif chunk_id == b'data':
+            if not byte_rate:
+                return None
+            # Streaming writers leave the size as 0/0xFFFFFFFF; trust the bytes present
+            available = len(data) - offset - 8
+            if chunk_size == 0 or chunk_size > available:
+                chunk_size = available
+            return chunk_size / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _probe_flac(data):
+    """Read total samples and sample rate from the STREAMINFO block."""
+    if len(data) < 26:
+        return None
+    # STREAMINFO body starts at byte 8: sample rate (20 bits), channels, bps, total samples (36 bits)
+    packed = int.from_bytes(data[18:26], 'big')
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return total_samples / sample_rate
+
+
+def _probe_ffprobe(data):
+    """Ask ffprobe for the container duration, reading the upload from stdin."""
+    command = [
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        'pipe:0',
+    ]
+    try:
+        proc = subprocess.run(command, input=data, capture_output=True, check=False, timeout=5)
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+
+    try:
+        return float(proc.stdout.decode().strip())
+    except ValueError:
+        # 'N/A' for streams without a duration in the header
+        return None
+
+
+def decode_audio(data, file_ext='', timer=None):
+    """
+    Decode raw uploaded bytes to a 16 kHz mono float32 numpy array.
+
+    Tries the native decoders first, then an ffmpeg pipe, then an ffmpeg
+    temp-file decode as the last resort. With a `StageTimer`, time spent is
+    recorded as `decode` (and `temp_file` for the fallback's disk I/O).
+    """
+    if not data:
+        raise AudioDecodeError("Audio file is empty")
+
+    file_ext = (file_ext or '').lower()
+
+    if file_ext in ('wav', 'flac') or data[:4] in (b'RIFF', b'fLaC'):
+        with timed(timer, 'decode'):
+            audio = _decode_native(data)
+        if audio is not None:
+            return audio
+
+    if file_ext not in UNPIPEABLE_EXTENSIONS:
+        try:
+            with timed(timer, 'decode'):
+                return _decode_ffmpeg_pipe(data)
+        except AudioDecodeError as e:
+            print(f"⚠️ ffmpeg pipe decode failed, falling back to temp file: {e}")
+
+    return _decode_ffmpeg_file(data, file_ext, timer)
+
+
+def _decode_native(data):
+    """
+    Decode 16 kHz WAV/FLAC in-process. Returns None if the format isn't
+    handled, or if the audio needs resampling (left to ffmpeg).
+    """
+    if soundfile is not None:
+        try:
+            if soundfile.info(io.BytesIO(data)).samplerate != SAMPLE_RATE:
+                return None
+            samples, _ = soundfile.read(io.BytesIO(data), dtype='float32', always_2d=True)
+            return np.ascontiguousarray(samples.mean(axis=1), dtype=np.float32)
+        except Exception:
+            pass
+
+    if data[:4] != b'RIFF':
+        return None
+
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav:
+            channels = wav.getnchannels()
+            sample_width = wav.getsampwidth()
+            if wav.getframerate() != SAMPLE_RATE:
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        # Non-PCM WAV (e.g. IEEE float, A-law) - let ffmpeg handle it
+        return None
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32)
+                | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        samples = ints.astype(np.float32) / 8388608.0
+    elif sample_width == 4:
+        samples = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2147483648.0
+    else:
+        return None
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def _ffmpeg_command(input_target):
+    return [
+        'ffmpeg', '-nostdin', '-threads', '0',
+        '-i', input_target,
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(SAMPLE_RATE),
+        '-loglevel', 'error',
+        'pipe:1',
+    ]
+
+
+def _pcm16_to_float(raw):
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _decode_ffmpeg_pipe(data):
+    """Stream the upload through ffmpeg's stdin and read PCM from stdout."""
+    try:
+        proc = subprocess.run(_ffmpeg_command('pipe:0'), input=data, capture_output=True, check=False)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg not found on PATH")
+
+    if proc.returncode != 0 or not proc.stdout:
+        raise AudioDecodeError(proc.stderr.decode(errors='ignore').strip() or "ffmpeg produced no audio")
+
+    return _pcm16_to_float(proc.stdout)
+
+
+def _decode_ffmpeg_file(data, file_ext, timer=None):
+    """Fallback: write the upload to a temp file so ffmpeg can seek."""
+    suffix = f'.{file_ext}' if file_ext else ''
+    with timed(timer, 'temp_file'):
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_file:
+            tmp_file.write(data)
+            tmp_path = tmp_file.name
+
+    try:
+        try:
+            with timed(timer, 'decode'):
+                proc = subprocess.run(_ffmpeg_command(tmp_path), capture_output=True, check=False)
+        except FileNotFoundError:
+            raise AudioDecodeError("ffmpeg not found on PATH")
+
+        if proc.returncode != 0 or not proc.stdout:
+            raise AudioDecodeError(proc.stderr.decode(errors='ignore').strip() or "ffmpeg produced no audio")
+
+        return _pcm16_to_float(proc.stdout)
+    finally:
+        with timed(timer, 'temp_file'):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
@@ -0,0 +1,335 @@
+"""
+Transcription backends for the Voice Transcription Service
+
+`/transcribe` talks to a backend rather than to a Whisper model directly, so
+the inference engine can be chosen per deployment:
+
+- `whisper`:        openai-whisper (PyTorch), the original engine
+- `faster-whisper`: CTranslate2 with int8 quantized weights, much faster on
+                    CPU-only nodes
+
+Every backend takes decoded 16 kHz float32 audio and returns dicts with
+`text`, `language` and `segments` (start/end/text), so the HTTP response
+shape doesn't depend on it.
+"""
+
+import contextlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+BACKEND_NAMES = ('whisper', 'faster-whisper')
+
+# Approximate resident size of FP32 Whisper weights, used to plan evictions
+# before a model is loaded (the real size is measured once it is).
+MODEL_MEMORY_MB = {
+    'tiny': 150, 'tiny.en': 150,
+    'base': 290, 'base.en': 290,
+    'small': 970, 'small.en': 970,
+    'medium': 3100, 'medium.en': 3100,
+    'turbo': 3200, 'large-v3-turbo': 3200,
+    'large': 6200, 'large-v1': 6200, 'large-v2': 6200, 'large-v3': 6200,
+}
+
+
+class TranscriptionBackend:
+    """Base class: one loaded model that can transcribe batches of answers."""
+
+    name = None
+
+    def __init__(self, model_size):
+        self.model_size = model_size
+
+    def transcribe(self, audio, language=None):
+        """Transcribe one decoded answer. Returns {"text", "language", "segments"}."""
+        raise NotImplementedError
+
+    def transcribe_batch(self, jobs):
+        """Transcribe a list of `(audio, language)` jobs, results in order."""
+        return [self.transcribe(audio, language) for audio, language in jobs]
+
+    def memory_bytes(self):
+        """Resident size of the model weights (estimated if it can't be measured)."""
+        return MODEL_MEMORY_MB.get(self.model_size, 1000) * 1024 * 1024
+
+    def info(self):
+        return {"backend": self.name, "model": self.model_size}
+
+
+class WhisperBackend(TranscriptionBackend):
+    """openai-whisper on PyTorch"""
+
+    name = 'whisper'
+
+    def __init__(self, model_size):
+        super().__init__(model_size)
+        import whisper
+        self.model = whisper.load_model(model_size)
+        # Encoder and decoder forward time, reported as the `encoder`/`decoder` stages
+        self._clock = threading.local()
+        self._time_module(self.model.encoder, 'encoder')
+        self._time_module(self.model.decoder, 'decoder')
+
+    def _time_module(self, module, stage):
+        def before(module, args):
+            self._clock.started = time.perf_counter()  # the encoder and decoder never nest
+
+        def after(module, args, output):
+            timings = getattr(self._clock, 'timings', None)
+            if timings is not None:
+                timings[stage] += time.perf_counter() - self._clock.started
+
+        module.register_forward_pre_hook(before)
+        module.register_forward_hook(after)
+
+    @contextlib.contextmanager
+    def _stage_timings(self):
+        """Collect encoder/decoder seconds spent on this thread into the yielded dict."""
+        timings = {"encoder": 0.0, "decoder": 0.0}
+        self._clock.timings = timings
+        try:
+            yield timings
+        finally:
+            self._clock.timings = None
+
+    def memory_bytes(self):
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def transcribe(self, audio, language=None):
+        # transcribe() computes the mel internally, so only the encoder/decoder are split out
+        with self._stage_timings() as timings:
+            result = self.model.transcribe(
+                audio,
+                language=language,
+                fp16=False  # Use FP32 for better compatibility
+            )
+        return {
+            "text": result.get('text', '').strip(),
+            "language": result.get('language', 'unknown'),
+            "segments": [
+                {"start": seg['start'], "end": seg['end'], "text": seg['text'].strip()}
+                for seg in result.get('segments', [])
+            ],
+            "timings": timings
+        }
+
+    def transcribe_batch(self, jobs):
+        """
+        Transcribe several answers with as few encoder passes as possible.
+
+        Answers that fit in one 30-second window are stacked into one mel
+        batch per language hint and decoded together. Longer answers keep the
+        full `transcribe` path (timestamp seeking, previous-text conditioning
+        and temperature fallback), as does a lone short answer, so how an
+        answer is transcribed never depends on what else was queued with it.
+        """
+        import torch
+        import whisper
+
+        short = [i for i, (audio, _) in enumerate(jobs) if len(audio) <= whisper.audio.N_SAMPLES]
+        if len(short) < 2:
+            return [self.transcribe(audio, language) for audio, language in jobs]
+
+        results = [None] * len(jobs)
+        for i, (audio, language) in enumerate(jobs):
+            if i not in short:
+                results[i] = self.transcribe(audio, language)
+
+        n_mels = getattr(self.model.dims, 'n_mels', 80)
+        mel_start = time.perf_counter()
+        mels = {
+            i: whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(torch.from_numpy(np.ascontiguousarray(jobs[i][0]))), n_mels
+            )
+            for i in short
+        }
+        mel_seconds = time.perf_counter() - mel_start
+
+        decoded = {}
+        with self._stage_timings() as timings:
+            for language in {jobs[i][1] for i in short}:
+                group = [i for i in short if jobs[i][1] == language]
+                mel_batch = torch.stack([mels[i] for i in group]).to(self.model.device)
+                options = whisper.DecodingOptions(language=language, fp16=False, without_timestamps=True)
+                with torch.no_grad():
+                    decoded.update(zip(group, whisper.decode(self.model, mel_batch, options)))
+
+        for i, result in decoded.items():
+            text = result.text.strip()
+            # Same silence rule Whisper's transcribe() uses to drop a window
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                text = ''
+            # Without timestamps the best we know is that the text spans the answer
+            segments = [{"start": 0.0, "end": len(jobs[i][0]) / whisper.audio.SAMPLE_RATE, "text": text}] if text else []
+            results[i] = {
+                "text": text,
+                "language": result.language or 'unknown',
+                "segments": segments,
+                # the whole batch's mel, encoder and decoder time, which every batched job waited for
+                "timings": dict(timings, mel=mel_seconds)
+            }
+
+        return results
+
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """CTranslate2 (faster-whisper) with int8 weights for CPU inference"""
+
+    name = 'faster-whisper'
+
+    def __init__(self, model_size):
+        super().__init__(model_size)
+        from faster_whisper import WhisperModel
+
+        self.compute_type = os.environ.get('CT2_COMPUTE_TYPE', 'int8')
+        self.cpu_threads = int(os.environ.get('CT2_CPU_THREADS', '0'))  # 0 = CTranslate2 default
+        self.beam_size = int(os.environ.get('CT2_BEAM_SIZE', '5'))
+        self.model = WhisperModel(
+            model_size,
+            device=os.environ.get('CT2_DEVICE', 'cpu'),
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads
+        )
+
+    def transcribe(self, audio, language=None):
+        segments, info = self.model.transcribe(audio, language=language, beam_size=self.beam_size)
+        # segments is a lazy generator - decoding happens while iterating
+        segments = [
+            {"start": segment.start, "end": segment.end, "text": segment.text.strip()}
+            for segment in segments
+        ]
+        text = " ".join(segment['text'] for segment in segments if segment['text']).strip()
+        return {"text": text, "language": info.language or 'unknown', "segments": segments}
+
+    def memory_bytes(self):
+        # CTranslate2 doesn't expose its allocation; scale the FP32 estimate
+        fp32_bytes = super().memory_bytes()
+        return fp32_bytes // 4 if self.compute_type.startswith('int8') else fp32_bytes
+
+    def info(self):
+        return {
+            "backend": self.name,
+            "model": self.model_size,
+            "computeType": self.compute_type,
+            "cpuThreads": self.cpu_threads,
+        }
+
+
+def load_backend(name, model_size):
+    """Instantiate a backend by name (see BACKEND_NAMES)."""
+    if name == 'faster-whisper':
+        return FasterWhisperBackend(model_size)
+    if name == 'whisper':
+        return WhisperBackend(model_size)
+    raise ValueError(f"Unknown transcription backend '{name}'. Choose from: {', '.join(BACKEND_NAMES)}")
+
+
+class ModelPool:
+    """
+    Keeps several model sizes resident within a memory budget.
+
+    Models load lazily on first use; when loading one would exceed the
+    budget, the least recently used models are unloaded first. A single model
+    larger than the whole budget is still loaded (alone). Loads run outside
+    the pool lock, so `stats()` answers during a cold load, and concurrent
+    callers for the same size wait for the one load.
+    """
+
+    def __init__(self, backend_name, memory_budget_mb=2048, on_load=None):
+        self.backend_name = backend_name
+        self.on_load = on_load  # callback(model_size, seconds), e.g. for metrics
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self._models = OrderedDict()  # size -> {"backend", "memory", "loadTime", "lastUsed"}
+        self._loading = {}  # size -> {"done": Event, "memory": estimated bytes, "error": exception}
+        self._lock = threading.Lock()
+
+    def get(self, model_size):
+        """Return the loaded backend for `model_size`, loading it if needed."""
+        while True:
+            with self._lock:
+                entry = self._models.get(model_size)
+                if entry is not None:
+                    self._models.move_to_end(model_size)
+                    entry["lastUsed"] = time.time()
+                    return entry["backend"]
+
+                loading = self._loading.get(model_size)
+                if loading is None:
+                    estimate = MODEL_MEMORY_MB.get(model_size, 1000) * 1024 * 1024
+                    self._make_room(estimate)
+                    loading = {"done": threading.Event(), "memory": estimate, "error": None}
+                    self._loading[model_size] = loading
+                    break
+
+            # Another caller is loading this size; use its result
+            loading["done"].wait()
+            if loading["error"] is not None:
+                raise loading["error"]
+
+        print(f"📥 Loading Whisper model ({model_size}) with {self.backend_name} backend...")
+        start = time.perf_counter()
+        try:
+            backend = load_backend(self.backend_name, model_size)
+            entry = {
+                "backend": backend,
+                "memory": backend.memory_bytes(),
+                "loadTime": time.perf_counter() - start,
+                "lastUsed": time.time(),
+            }
+        except Exception as e:
+            loading["error"] = e
+            raise
+        else:
+            with self._lock:
+                self._models[model_size] = entry
+        finally:
+            with self._lock:
+                self._loading.pop(model_size, None)
+            loading["done"].set()
+
+        print(f"✅ Whisper model ({model_size}) loaded in {entry['loadTime']:.1f}s")
+        if self.on_load is not None:
+            self.on_load(model_size, entry["loadTime"])
+        return backend
+
+    def _make_room(self, needed):
+        """Unload LRU models until `needed` fits next to the loaded and loading ones. Hold the lock."""
+        used = sum(entry["memory"] for entry in self._models.values())
+        used += sum(loading["memory"] for loading in self._loading.values())
+        evicted = False
+        while self._models and used + needed > self.memory_budget:
+            size, entry = self._models.popitem(last=False)
+            used -= entry["memory"]
+            evicted = True
+            print(f"♻️ Unloading Whisper model ({size}) to stay within memory budget")
+        if evicted:
+            # Release the evicted weights before allocating the next model
+            import gc
+            gc.collect()
+
+    def is_loaded(self, model_size):
+        return model_size in self._models
+
+    def stats(self):
+        with self._lock:
+            models = [
+                {
+                    "model": size,
+                    "memoryMb": round(entry["memory"] / (1024 * 1024), 1),
+                    "loadTimeSeconds": round(entry["loadTime"], 2),
+                    "lastUsed": round(entry["lastUsed"], 1),
+                }
+                for size, entry in self._models.items()
+            ]
+            loading = list(self._loading)
+        return {
+            "backend": self.backend_name,
+            "memoryBudgetMb": round(self.memory_budget / (1024 * 1024)),
+            "memoryUsedMb": round(sum(m["memoryMb"] for m in models), 1),
+            "loaded": models,
+            "loading": loading,
+        }
@@ -0,0 +1,200 @@
+"""
+Micro-batching scheduler for Whisper transcriptions
+
+Flask handles each request on its own thread, but the Whisper model is a
+single shared object. Instead of letting every request call `transcribe`
+concurrently (competing torch thread pools) the scheduler funnels requests
+through one worker thread. Requests that arrive within a short window are
+grouped and run as one batched encoder/decoder pass, then each waiting
+request gets its own result back. Queue depth is bounded; when it is full
+callers get a `QueueFullError` carrying a Retry-After estimate.
+"""
+
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class QueueFullError(Exception):
+    """Raised when the transcription queue is at its depth limit."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Transcription queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TranscriptionBatcher:
+    """
+    Collects transcription jobs for up to `window_ms` (or `max_batch_size`
+    jobs) and hands them to `run_batch` in one call.
+
+    `run_batch(jobs)` receives a list of `(audio, language, model)` tuples and
+    must return a list of result dicts in the same order (an Exception in
+    place of a result fails only that job). `max_depth` limits queued plus
+    running jobs. `on_batch(size, queue_waits, seconds)`, if given, is called
+    after every batch (e.g. to export metrics).
+    """
+
+    def __init__(self, run_batch, window_ms=30, max_batch_size=8, max_depth=32, stats_window=500,
+                 on_batch=None):
+        self.run_batch = run_batch
+        self.on_batch = on_batch
+        self.window = max(window_ms, 0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_depth = max(max_depth, 1)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._outstanding = 0  # queued + running jobs
+        self._idle = threading.Condition(self._lock)
+        self._rejected = 0
+        self._latencies = deque(maxlen=stats_window)
+        self._completions = deque(maxlen=stats_window)
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._total_requests = 0
+        self._total_batches = 0
+
+        self._worker = threading.Thread(target=self._run, name='whisper-batcher', daemon=True)
+        self._worker.start()
+
+    def submit_async(self, audio, language=None, model=None, timer=None):
+        """
+        Queue a decoded answer. Returns a Future for its result dict.
+        A `StageTimer` gets the job's `queue_wait` and `inference` time.
+        """
+        with self._lock:
+            if self._outstanding >= self.max_depth:
+                self._rejected += 1
+                full = True
+            else:
+                full = False
+                self._outstanding += 1
+        if full:
+            raise QueueFullError(self.retry_after())
+        future = Future()
+        self._queue.put(((audio, language, model), future, time.perf_counter(), timer))
+        return future
+
+    def submit(self, audio, language=None, model=None, timeout=None, timer=None):
+        """Queue a decoded answer and block until its transcription is ready."""
+        return self.submit_async(audio, language, model, timer).result(timeout=timeout)
+
+    def free_slots(self):
+        with self._lock:
+            return max(self.max_depth - self._outstanding, 0)
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained."""
+        with self._lock:
+            depth = self._outstanding
+            latencies = sorted(self._latencies)
+            avg_batch = float(np.mean(self._batch_sizes)) if self._batch_sizes else 1.0
+        # A batch takes about one request latency, shared by its jobs
+        per_job = latencies[len(latencies) // 2] / avg_batch if latencies else 1.0
+        return max(1, math.ceil(per_job * depth))
+
+    def wait_idle(self, timeout=None):
+        """Block until every queued job has finished. Returns False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._outstanding == 0, timeout=timeout)
+
+    def stats(self):
+        """Snapshot of throughput and latency for sizing pods."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            completions = list(self._completions)
+            batch_sizes = list(self._batch_sizes)
+            total_requests = self._total_requests
+            total_batches = self._total_batches
+            outstanding = self._outstanding
+            rejected = self._rejected
+
+        now = time.perf_counter()
+        recent = [t for t in completions if now - t <= 60]
+
+        return {
+            "windowMs": round(self.window * 1000),
+            "maxBatchSize": self.max_batch_size,
+            "queueDepth": self._queue.qsize(),
+            "outstanding": outstanding,
+            "maxDepth": self.max_depth,
+            "rejected": rejected,
+            "totalRequests": total_requests,
+            "totalBatches": total_batches,
+            "avgBatchSize": round(float(np.mean(batch_sizes)), 2) if batch_sizes else 0,
+            "throughputPerMin": len(recent),
+            "latencyP50Ms": _percentile_ms(latencies, 50),
+            "latencyP95Ms": _percentile_ms(latencies, 95),
+        }
+
+    def _collect(self):
+        """Block for the first job, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            jobs = [job for job, _, _, _ in batch]
+            started = time.perf_counter()
+
+            try:
+                results = self.run_batch(jobs)
+            except Exception as e:
+                for _, future, _, _ in batch:
+                    future.set_exception(e)
+                self._finish(len(batch))
+                continue
+
+            finished = time.perf_counter()
+            with self._lock:
+                self._total_batches += 1
+                self._batch_sizes.append(len(batch))
+                for (_, _, submitted, _), _ in zip(batch, results):
+                    self._total_requests += 1
+                    self._latencies.append(finished - submitted)
+                    self._completions.append(finished)
+
+            for _, _, submitted, timer in batch:
+                if timer is not None:
+                    timer.add('queue_wait', started - submitted)
+                    timer.add('inference', finished - started)
+            if self.on_batch is not None:
+                self.on_batch(len(batch), [started - submitted for _, _, submitted, _ in batch], finished - started)
+
+            for (_, future, _, _), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self._finish(len(batch))
+
+    def _finish(self, count):
+        with self._idle:
+            self._outstanding -= count
+            if self._outstanding == 0:
+                self._idle.notify_all()
+
+
+def _percentile_ms(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return round(sorted_values[index] * 1000, 1)
+
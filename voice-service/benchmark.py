@@ -0,0 +1,496 @@
+"""
+Latency and throughput benchmark for the Voice Transcription Service
+
+Sends a corpus of interview-length answers (5, 30 and 90 seconds, as wav,
+webm and ogg) through `/transcribe` at several concurrency levels and
+reports end-to-end latency, real-time factor, the decode vs inference
+split (from the service's `Server-Timing` stages), peak RSS and
+throughput. Results are printed as a table and optionally written as JSON
+so runs can be diffed between releases.
+
+The corpus is generated locally and deterministically (a speech-like
+voiced signal with syllables, words and pauses; webm/ogg are Opus-encoded
+with ffmpeg like browser recordings), so no network access or sample
+files are needed. Whisper's output on it is meaningless - use `--corpus`
+with real recordings when decoding length matters, and
+compare_backends.py for accuracy.
+
+Modes:
+    http     - a running service at --url
+    app      - the Flask app in this process (decode, scheduler, batching included)
+    backend  - decode_audio + the transcription backend only
+
+`--stub` swaps the model for a stub backend that sleeps for a fixed
+real-time factor, so the app/backend modes run without Whisper weights.
+
+Usage:
+    python benchmark.py --mode app --stub --concurrency 1 2 4 --output bench.json
+    python benchmark.py --mode app --backend faster-whisper --model base --durations 5s 30s
+    python benchmark.py --mode http --url http://localhost:5001 --service-pid 1234
+    python benchmark.py --mode backend --model small --corpus recordings/
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Nominal length -> seconds; the longest stays just under the 90-second
+# answer limit so container padding can't push it over
+DURATIONS = {"5s": 5, "30s": 30, "90s": 89}
+
+# Container -> ffmpeg output args (None: written directly)
+CONTAINERS = {
+    "wav": None,
+    "webm": ['-c:a', 'libopus', '-b:a', '32k', '-f', 'webm'],
+    "ogg": ['-c:a', 'libopus', '-b:a', '32k', '-f', 'ogg'],
+}
+
+AUDIO_EXTENSIONS = {'wav', 'mp3', 'm4a', 'webm', 'ogg', 'flac'}
+
+# Server-Timing stages that make up decoding the upload
+DECODE_STAGES = ('probe', 'temp_file', 'decode')
+
+CORPUS_VERSION = 1  # bump when the generator changes, so old corpora are regenerated
+
+
+# ============================================
+# CORPUS
+# ============================================
+
+def synthesize_speech(seconds, seed=0):
+    """
+    Speech-like 16 kHz float32 audio: voiced syllables (a harmonic series
+    shaped by two vowel formants, with a gliding pitch) grouped into words
+    and sentences with pauses, over a low noise floor.
+    """
+    rng = np.random.default_rng(seed)
+    vowels = [(730, 1090), (270, 2290), (300, 870), (530, 1840), (640, 1190)]
+    total = int(seconds * SAMPLE_RATE)
+    audio = np.zeros(total, dtype=np.float32)
+
+    position = int(0.3 * SAMPLE_RATE)
+    words = 0
+    while position < total:
+        for _ in range(rng.integers(1, 4)):
+            length = int(rng.uniform(0.12, 0.3) * SAMPLE_RATE)
+            if position + length >= total:
+                break
+            f1, f2 = vowels[rng.integers(len(vowels))]
+            f0 = np.linspace(rng.uniform(100, 180), rng.uniform(90, 170), length)
+            phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+            syllable = np.zeros(length)
+            for k in range(1, 25):
+                frequency = k * f0.mean()
+                gain = np.exp(-((frequency - f1) / 200) ** 2) + 0.6 * np.exp(-((frequency - f2) / 300) ** 2) + 0.05
+                syllable += gain / k * np.sin(k * phase)
+            audio[position:position + length] += (syllable * np.hanning(length)).astype(np.float32)
+            position += length + int(rng.uniform(0.02, 0.06) * SAMPLE_RATE)
+        words += 1
+        # Short gaps between words, longer ones between sentences
+        pause = rng.uniform(0.4, 0.8) if words % 8 == 0 else rng.uniform(0.08, 0.2)
+        position += int(pause * SAMPLE_RATE)
+
+    audio *= 0.5 / max(float(np.abs(audio).max()), 1e-6)
+    audio += rng.normal(0, 0.003, total).astype(np.float32)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def encode(audio, container):
+    """16-bit mono WAV bytes, or the container produced by piping them through ffmpeg."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes((audio * 32767).astype('<i2').tobytes())
+    if CONTAINERS[container] is None:
+        return buffer.getvalue()
+
+    command = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0',
+               *CONTAINERS[container], 'pipe:1']
+    try:
+        proc = subprocess.run(command, input=buffer.getvalue(), capture_output=True, check=False)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg not found on PATH (needed to build the webm/ogg corpus)")
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(f"ffmpeg failed to encode {container}: {proc.stderr.decode(errors='ignore').strip()}")
+    return proc.stdout
+
+
+def generated_corpus(corpus_dir, durations, containers):
+    """Build (or reuse) the synthetic corpus in `corpus_dir`."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    items = []
+    for label in durations:
+        audio = None
+        for container in containers:
+            path = os.path.join(corpus_dir, f"speech-v{CORPUS_VERSION}-{label}.{container}")
+            if not os.path.exists(path):
+                if audio is None:
+                    audio = synthesize_speech(DURATIONS[label], seed=DURATIONS[label])
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(encode(audio, container))
+                os.replace(path + '.tmp', path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            items.append({
+                "name": f"{label}.{container}",
+                "container": container,
+                "duration": float(DURATIONS[label]),
+                "data": data,
+            })
+    return items
+
+
+def directory_corpus(corpus_dir):
+    """Every audio file in `corpus_dir`, with its decoded duration."""
+    from audio_io import decode_audio, decoded_duration
+
+    items = []
+    for filename in sorted(os.listdir(corpus_dir)):
+        ext = filename.rpartition('.')[2].lower()
+        if ext not in AUDIO_EXTENSIONS:
+            continue
+        with open(os.path.join(corpus_dir, filename), 'rb') as f:
+            data = f.read()
+        items.append({
+            "name": filename,
+            "container": ext,
+            "duration": round(decoded_duration(decode_audio(data, ext)), 2),
+            "data": data,
+        })
+    return items
+
+
+# ============================================
+# TARGETS
+# ============================================
+
+class StubBackend:
+    """Stand-in for a Whisper backend: sleeps `rtf` times the audio duration."""
+
+    name = 'stub'
+
+    def __init__(self, model_size, rtf=0.1):
+        self.model_size = model_size
+        self.rtf = rtf
+
+    def transcribe(self, audio, language=None):
+        time.sleep(len(audio) / SAMPLE_RATE * self.rtf)
+        return {"text": "stub transcript", "language": language or 'en', "segments": []}
+
+    def transcribe_batch(self, jobs):
+        return [self.transcribe(audio, language) for audio, language in jobs]
+
+    def memory_bytes(self):
+        return 0
+
+    def info(self):
+        return {"backend": self.name, "model": self.model_size, "rtf": self.rtf}
+
+
+def parse_server_timing(header):
+    """`decode;dur=12.3, inference;dur=840.0` -> {"decode": 0.0123, "inference": 0.84}"""
+    stages = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.startswith('dur='):
+            stages[name] = float(params[4:]) / 1000
+    return stages
+
+
+def multipart_body(data, filename, fields):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="audio"; filename="{filename}"\r\n'
+                 f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+    parts.append(data)
+    parts.append(f'\r\n--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+class HttpTarget:
+    def __init__(self, url, language):
+        self.url = url.rstrip('/')
+        self.fields = {"language": language} if language else {}
+
+    def transcribe(self, data, filename):
+        body, content_type = multipart_body(data, filename, self.fields)
+        request = urllib.request.Request(
+            f"{self.url}/transcribe",
+            data=body,
+            headers={"Content-Type": content_type, "X-Profile": "1"},
+            method='POST'
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                payload = json.loads(response.read())
+                stages = parse_server_timing(response.headers.get('Server-Timing'))
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"HTTP {e.code}: {e.read().decode(errors='ignore')[:200]}")
+        return time.perf_counter() - start, stages, payload["data"]
+
+
+class AppTarget:
+    def __init__(self, language, backend=None, model=None, stub_rtf=None):
+        # Measure decoding and inference, not the result cache
+        os.environ['TRANSCRIPTION_CACHE_SIZE'] = '0'
+        os.environ.pop('TRANSCRIPTION_CACHE_DIR', None)
+        os.environ['PROFILE_HEADER_ENABLED'] = 'true'
+        if backend:
+            os.environ['TRANSCRIPTION_BACKEND'] = backend
+        if model:
+            # Every answer on the requested model, not just the long ones
+            os.environ['WHISPER_MODEL_SIZE'] = model
+            os.environ['WHISPER_SHORT_MODEL_SIZE'] = ''
+
+        import backends
+        if stub_rtf is not None:
+            backends.load_backend = lambda name, model_size: StubBackend(model_size, stub_rtf)
+
+        import app as service
+        # Models load on a background thread; wait for them like /health/ready would
+        service.startup.wait()
+        if service.startup.state == 'failed' or not service.whisper_available:
+            raise RuntimeError(f"The service could not load its transcription backend: {service.startup.error}")
+        self.client = service.app.test_client()
+        self.fields = {"language": language} if language else {}
+
+    def transcribe(self, data, filename):
+        start = time.perf_counter()
+        response = self.client.post(
+            '/transcribe',
+            data=dict(self.fields, audio=(io.BytesIO(data), filename)),
+            content_type='multipart/form-data',
+            headers={"X-Profile": "1"}
+        )
+        latency = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return latency, parse_server_timing(response.headers.get('Server-Timing')), response.json["data"]
+
+
+class BackendTarget:
+    def __init__(self, language, backend, model, stub_rtf=None):
+        from backends import load_backend
+        model = model or os.environ.get('WHISPER_MODEL_SIZE', 'base')
+        if stub_rtf is not None:
+            self.backend = StubBackend(model, stub_rtf)
+        else:
+            self.backend = load_backend(backend or os.environ.get('TRANSCRIPTION_BACKEND', 'whisper'), model)
+        self.language = language
+
+    def transcribe(self, data, filename):
+        from audio_io import decode_audio
+        from metrics import StageTimer
+
+        timer = StageTimer()
+        start = time.perf_counter()
+        audio = decode_audio(data, filename.rpartition('.')[2], timer)
+        with timer.stage('inference'):
+            result = self.backend.transcribe(audio, self.language)
+        latency = time.perf_counter() - start
+        return latency, dict(timer.stages), {"model": self.backend.model_size, "text": result["text"]}
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+def peak_rss_mb(pid=None):
+    """Peak resident memory of this process, or of `pid` (Linux /proc) when given."""
+    if pid:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            return None
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_level(target, item, concurrency, requests, service_pid=None):
+    rows = []
+    errors = []
+    lock = threading.Lock()
+    filename = f"answer.{item['container']}"
+
+    def one(_):
+        try:
+            latency, stages, data = target.transcribe(item["data"], filename)
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        with lock:
+            rows.append({"latency": latency, "stages": stages, "model": data.get("model")})
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    duration = item["duration"]
+    latencies = [r["latency"] for r in rows]
+    stage_names = sorted({name for r in rows for name in r["stages"] if name != 'total'})
+    # A response without an inference stage came from the service's result cache
+    cache_hits = sum(1 for r in rows if r["stages"] and 'inference' not in r["stages"])
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": len(rows),
+        "errors": len(errors),
+        "errorSamples": errors[:3],
+        "cacheHits": cache_hits,
+        "models": sorted({r["model"] for r in rows if r["model"]}),
+        "latencyP50Ms": _ms(latencies, 50),
+        "latencyP95Ms": _ms(latencies, 95),
+        "meanRtf": round(float(np.mean(latencies)) / duration, 3) if latencies and duration else None,
+        "decodeP50Ms": _ms([sum(r["stages"].get(s, 0) for s in DECODE_STAGES) for r in rows if r["stages"]], 50),
+        "inferenceP50Ms": _ms([r["stages"]["inference"] for r in rows if 'inference' in r["stages"]], 50),
+        "queueWaitP50Ms": _ms([r["stages"]["queue_wait"] for r in rows if 'queue_wait' in r["stages"]], 50),
+        "stageP50Ms": {name: _ms([r["stages"].get(name, 0) for r in rows], 50) for name in stage_names},
+        "throughputRps": round(len(rows) / wall, 3) if wall else None,
+        "audioSecondsPerSecond": round(len(rows) * duration / wall, 3) if wall else None,
+        "wallSeconds": round(wall, 2),
+        "peakRssMb": peak_rss_mb(service_pid),
+    }
+
+
+def _ms(values, percentile):
+    if not values:
+        return None
+    return round(float(np.percentile(values, percentile)) * 1000, 1)
+
+
+def print_report(results):
+    print()
+    print(f"{'audio':<12}{'conc':>5}{'ok':>5}{'err':>5}{'lat p50':>10}{'lat p95':>10}{'RTF':>7}"
+          f"{'decode':>9}{'infer':>9}{'req/s':>8}{'RSS MB':>9}")
+    print("-" * 89)
+    for r in results:
+        def fmt(value, spec='.0f'):
+            return format(value, spec) if value is not None else '-'
+        print(f"{r['audio']:<12}{r['concurrency']:>5}{r['completed']:>5}{r['errors']:>5}"
+              f"{fmt(r['latencyP50Ms']):>10}{fmt(r['latencyP95Ms']):>10}{fmt(r['meanRtf'], '.2f'):>7}"
+              f"{fmt(r['decodeP50Ms'], '.1f'):>9}{fmt(r['inferenceP50Ms']):>9}"
+              f"{r['throughputRps'] or 0:>8.2f}{fmt(r['peakRssMb']):>9}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark voice transcription latency and throughput")
+    parser.add_argument('--mode', choices=['http', 'app', 'backend'], default='app')
+    parser.add_argument('--url', default='http://localhost:5001', help="Service URL for --mode http")
+    parser.add_argument('--stub', action='store_true', help="Use a stub backend (no Whisper weights)")
+    parser.add_argument('--stub-rtf', type=float, default=0.1, help="Real-time factor of the stub backend")
+    parser.add_argument('--backend', default=None, help="Transcription backend for app/backend modes "
+                        "(default: TRANSCRIPTION_BACKEND or whisper)")
+    parser.add_argument('--model', default=None, help="Model size for every answer in app/backend modes "
+                        "(default: the service's own routing)")
+    parser.add_argument('--language', default='en', help="Language hint sent with every answer ('' to detect)")
+    parser.add_argument('--durations', nargs='+', default=list(DURATIONS), choices=list(DURATIONS))
+    parser.add_argument('--containers', nargs='+', default=list(CONTAINERS), choices=list(CONTAINERS))
+    parser.add_argument('--corpus', help="Directory of real recordings to use instead of the generated corpus")
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'voice-benchmark-corpus'),
+                        help="Where the generated corpus is kept between runs")
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--requests', type=int, default=None,
+                        help="Requests per level (default: 2 x concurrency, at least 4)")
+    parser.add_argument('--service-pid', type=int, help="Report peak RSS of this PID instead of the benchmark")
+    parser.add_argument('--output', help="Write results as JSON")
+    args = parser.parse_args()
+
+    if args.mode == 'http' and (args.stub or args.backend or args.model):
+        parser.error("--stub/--backend/--model apply to app/backend modes; configure the service itself for http")
+
+    if args.corpus:
+        items = directory_corpus(args.corpus)
+        if not items:
+            parser.error(f"No audio files found in {args.corpus}")
+    else:
+        print(f"📁 Corpus: {args.corpus_dir}")
+        items = generated_corpus(args.corpus_dir, args.durations, args.containers)
+
+    stub_rtf = args.stub_rtf if args.stub else None
+    if args.mode == 'http':
+        target = HttpTarget(args.url, args.language)
+    elif args.mode == 'app':
+        target = AppTarget(args.language, args.backend, args.model, stub_rtf)
+    else:
+        target = BackendTarget(args.language or None, args.backend, args.model, stub_rtf)
+
+    print(f"🎙️ Benchmarking mode={args.mode}{' (stub)' if args.stub else ''} "
+          f"audio={len(items)} files concurrency={args.concurrency}")
+
+    # One untimed request so model loading and first-call costs don't skew the first level
+    print("⏳ Warming up...")
+    warmup = min(items, key=lambda item: item["duration"])
+    target.transcribe(warmup["data"], f"answer.{warmup['container']}")
+
+    results = []
+    for item in items:
+        for concurrency in args.concurrency:
+            requests = args.requests or max(4, 2 * concurrency)
+            print(f"⏳ {item['name']} x{concurrency} ({requests} requests)...")
+            result = run_level(target, item, concurrency, requests, args.service_pid)
+            result = dict(audio=item["name"], container=item["container"], duration=item["duration"], **result)
+            results.append(result)
+            if result["cacheHits"]:
+                print(f"⚠️ {result['cacheHits']} responses came from the result cache; "
+                      f"start the service with TRANSCRIPTION_CACHE_SIZE=0")
+
+    print_report(results)
+
+    if args.output:
+        report = {
+            "mode": args.mode,
+            "stub": args.stub,
+            "stubRtf": stub_rtf,
+            "backend": args.backend,
+            "model": args.model,
+            "language": args.language or None,
+            "url": args.url if args.mode == 'http' else None,
+            "corpus": args.corpus or f"generated-v{CORPUS_VERSION}",
+            "audio": [
+                {"name": item["name"], "duration": item["duration"], "bytes": len(item["data"])}
+                for item in items
+            ],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpuCount": os.cpu_count(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "results": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
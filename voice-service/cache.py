@@ -0,0 +1,218 @@
+"""
+Caches for the Voice Transcription Service
+
+- `LRUCache`: small thread-safe in-memory LRU with an optional TTL
+- `DiskCache`: JSON files on disk with TTL and total-size eviction
+- `TranscriptionCache`: content-addressed transcription results (memory tier
+  in front of an optional disk tier), so retried uploads of the same audio
+  return instantly instead of re-running Whisper
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping with optional per-entry TTL (seconds)."""
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+        }
+
+
+class DiskCache:
+    """
+    JSON-per-key cache directory with TTL and size-based (oldest first) eviction.
+
+    The directory size is tracked as entries are written and only rescanned
+    once it goes over max_bytes (eviction then goes down to EVICT_TO of it,
+    so the next writes don't rescan), or every RESCAN_SECONDS, since pre-fork
+    workers share the directory and each only sees its own writes.
+    """
+
+    EVICT_TO = 0.9
+    RESCAN_SECONDS = 300
+
+    def __init__(self, directory, ttl=86400, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._scanned_at = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if time.time() - stat.st_mtime > self.ttl:
+                os.remove(path)
+                with self._lock:
+                    self._bytes -= stat.st_size
+                raise FileNotFoundError(path)
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.tmp'
+        data = json.dumps(value).encode('utf-8')
+        try:
+            previous = os.path.getsize(path)
+        except OSError:
+            previous = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Failed to write cache entry: {e}")
+            return
+
+        with self._lock:
+            self._bytes += len(data) - previous
+            rescan = (self._bytes > self.max_bytes
+                      or time.monotonic() - self._scanned_at > self.RESCAN_SECONDS)
+        if rescan:
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then (if over max_bytes) the oldest ones down to EVICT_TO."""
+        with self._lock:
+            now = time.time()
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.ttl:
+                    _remove_quietly(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                for _, size, path in sorted(entries):
+                    if total <= self.max_bytes * self.EVICT_TO:
+                        break
+                    _remove_quietly(path)
+                    total -= size
+            self._bytes = total
+            self._scanned_at = time.monotonic()
+
+    def stats(self):
+        return {"directory": self.directory, "hits": self.hits, "misses": self.misses, "bytes": self._bytes}
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TranscriptionCache:
+    """Transcription results keyed by a hash of the audio bytes plus settings."""
+
+    def __init__(self, max_entries=256, disk_dir=None, disk_ttl=86400, disk_max_bytes=200 * 1024 * 1024):
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(disk_dir, disk_ttl, disk_max_bytes) if disk_dir else None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(audio_bytes, *settings):
+        digest = hashlib.sha256(audio_bytes)
+        for setting in settings:
+            digest.update(b'\0' + str(setting or '').encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)  # promote to the memory tier
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 3) if lookups else 0,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk else None,
+        }
@@ -0,0 +1,153 @@
+"""
+Side-by-side accuracy/latency report for transcription backends
+
+Runs every audio file in a local sample directory through each backend and
+reports word error rate (against `<name>.txt` reference transcripts, when
+present), inference latency and real-time factor.
+
+Usage:
+    python compare_backends.py samples/ --model base
+    python compare_backends.py samples/ --backends whisper faster-whisper --output report.json
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from audio_io import decode_audio, decoded_duration
+from backends import BACKEND_NAMES, load_backend
+
+AUDIO_EXTENSIONS = {'wav', 'mp3', 'm4a', 'webm', 'ogg', 'flac'}
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Levenshtein distance over words divided by the reference length."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def load_samples(sample_dir):
+    samples = []
+    for filename in sorted(os.listdir(sample_dir)):
+        stem, _, ext = filename.rpartition('.')
+        if ext.lower() not in AUDIO_EXTENSIONS:
+            continue
+
+        with open(os.path.join(sample_dir, filename), 'rb') as f:
+            audio = decode_audio(f.read(), ext)
+
+        reference_path = os.path.join(sample_dir, f'{stem}.txt')
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding='utf-8') as f:
+                reference = f.read().strip()
+
+        samples.append({"name": filename, "audio": audio, "reference": reference})
+    return samples
+
+
+def run_backend(name, model_size, samples, language):
+    load_start = time.perf_counter()
+    backend = load_backend(name, model_size)
+    load_time = time.perf_counter() - load_start
+
+    # Warm up so the first sample doesn't pay one-off allocation costs
+    backend.transcribe(samples[0]["audio"], language)
+
+    rows = []
+    for sample in samples:
+        start = time.perf_counter()
+        result = backend.transcribe(sample["audio"], language)
+        latency = time.perf_counter() - start
+        duration = decoded_duration(sample["audio"])
+
+        rows.append({
+            "sample": sample["name"],
+            "duration": round(duration, 2),
+            "latency": round(latency, 3),
+            "rtf": round(latency / duration, 3) if duration else None,
+            "wer": round(word_error_rate(sample["reference"], result["text"]), 4)
+            if sample["reference"] is not None else None,
+            "text": result["text"],
+        })
+
+    wers = [r["wer"] for r in rows if r["wer"] is not None]
+    latencies = [r["latency"] for r in rows]
+    total_audio = sum(r["duration"] for r in rows)
+
+    return {
+        "backend": name,
+        "info": backend.info(),
+        "loadTime": round(load_time, 2),
+        "meanWer": round(float(np.mean(wers)), 4) if wers else None,
+        "meanLatency": round(float(np.mean(latencies)), 3),
+        "p95Latency": round(float(np.percentile(latencies, 95)), 3),
+        "rtf": round(sum(latencies) / total_audio, 3) if total_audio else None,
+        "samples": rows,
+    }
+
+
+def print_report(reports):
+    print()
+    print(f"{'backend':<16}{'load s':>8}{'WER':>8}{'mean s':>9}{'p95 s':>9}{'RTF':>8}")
+    print("-" * 58)
+    for report in reports:
+        wer = f"{report['meanWer']:.3f}" if report['meanWer'] is not None else '-'
+        rtf = f"{report['rtf']:.3f}" if report['rtf'] is not None else '-'
+        print(f"{report['backend']:<16}{report['loadTime']:>8.1f}{wer:>8}"
+              f"{report['meanLatency']:>9.3f}{report['p95Latency']:>9.3f}{rtf:>8}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcription backends on local samples")
+    parser.add_argument('sample_dir', help="Directory of audio files with optional <name>.txt references")
+    parser.add_argument('--backends', nargs='+', default=list(BACKEND_NAMES), choices=BACKEND_NAMES)
+    parser.add_argument('--model', default=os.environ.get('WHISPER_MODEL_SIZE', 'base'))
+    parser.add_argument('--language', default=None, help="Language hint passed to every backend")
+    parser.add_argument('--output', help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    samples = load_samples(args.sample_dir)
+    if not samples:
+        parser.error(f"No audio files found in {args.sample_dir}")
+
+    print(f"🎙️ Comparing {', '.join(args.backends)} on {len(samples)} samples (model: {args.model})")
+
+    reports = []
+    for name in args.backends:
+        print(f"⏳ Running {name}...")
+        reports.append(run_backend(name, args.model, samples, args.language))
+
+    print_report(reports)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"model": args.model, "reports": reports}, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
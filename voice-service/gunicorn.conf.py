@@ -0,0 +1,87 @@
+"""
+Gunicorn settings for the Voice Transcription Service
+
+    gunicorn -c gunicorn.conf.py app:app
+
+gthread workers keep idle and keep-alive connections on an event loop and
+run requests on a bounded thread pool; handlers block on the transcription
+queue, which runs inference on a single thread with its own depth limit
+(WHISPER_QUEUE_MAX_DEPTH -> 429).
+
+With WEB_WORKERS > 1 (whisper backend, CPU) the service runs pre-forked:
+the master loads and warms the models once, then forks the workers, which
+share the weight pages copy-on-write. Each worker gets its own scheduler and
+TORCH_NUM_THREADS torch threads (default: CPUs / WEB_WORKERS). The port is
+bound right away, but workers are only forked (and requests served) once that
+load has finished; with a single worker the load runs in the background and
+/health/ready reports its progress.
+
+On SIGTERM the service stops accepting work (new requests get 503), lets
+in-flight requests finish for up to GRACEFUL_TIMEOUT seconds, then exits.
+"""
+
+import glob
+import os
+import signal
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = max(int(os.environ.get('WEB_WORKERS', '1')), 1)
+worker_class = 'gthread'
+# Request threads mostly wait on uploads, ffmpeg and the queue; a WebSocket
+# stream holds one for its whole duration
+threads = int(os.environ.get('WEB_THREADS', str(max(8, 4 * (os.cpu_count() or 1)))))
+timeout = int(os.environ.get('WEB_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+accesslog = '-'
+
+# CTranslate2 starts its threads when a model loads and those don't survive
+# fork(), so faster-whisper workers each load their own copy instead
+preload_app = workers > 1 and os.environ.get('TRANSCRIPTION_BACKEND', 'whisper') == 'whisper'
+
+worker_torch_threads = int(os.environ.get('TORCH_NUM_THREADS', '0')) or None
+if workers > 1 and not worker_torch_threads:
+    worker_torch_threads = max((os.cpu_count() or 1) // workers, 1)
+if workers > 1:
+    # Workers exchange metrics snapshots here so any of them can answer /metrics
+    os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'voice-service-metrics'))
+if preload_app:
+    # The master loads and warms single-threaded: an OpenMP pool started
+    # before fork() is unusable in the children, which size their own
+    os.environ['TORCH_NUM_THREADS'] = '1'
+
+
+def on_starting(server):
+    # Counters restart with the service; drop snapshots of a previous run
+    metrics_dir = os.environ.get('METRICS_DIR')
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, '*.json')):
+            os.remove(path)
+
+
+def when_ready(server):
+    if preload_app:
+        sys.modules['app'].prepare_prefork()
+
+
+def post_worker_init(worker):
+    service = sys.modules['app']
+    if workers > 1:
+        service.init_worker(worker_torch_threads, preloaded=preload_app)
+
+    handle_exit = worker.handle_exit
+
+    def drain_and_exit(sig, frame):
+        service.begin_drain()
+        handle_exit(sig, frame)
+
+    worker.handle_exit = drain_and_exit
+    signal.signal(signal.SIGTERM, drain_and_exit)
+
+
+def worker_exit(server, worker):
+    service = sys.modules.get('app')
+    if service is not None:
+        service.drain(timeout=graceful_timeout)
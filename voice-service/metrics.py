@@ -0,0 +1,287 @@
+"""
+Prometheus metrics and per-request stage timing for the Voice Transcription Service
+
+A small registry of counters, histograms and gauges rendered in the
+Prometheus text format on `GET /metrics`, plus a `StageTimer` that records
+how long each stage of one request took. Stage timings are both observed
+into a histogram and, when the client sends `X-Profile: 1`, returned in a
+`Server-Timing` response header.
+
+With pre-forked workers each process has its own registry. Workers write a
+snapshot to METRICS_DIR every few seconds, and `/metrics` adds up the
+snapshots of the other workers, so whichever worker answers the scrape
+reports totals for the whole service.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Seconds; covers fast cache hits through 90-second answers on CPU
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, key, extra=None):
+    pairs = list(zip(labelnames, key)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return {"values": [[list(key), value] for key, value in self._values.items()]}
+
+    def render(self, snapshots):
+        totals = {}
+        for snap in snapshots:
+            for key, value in snap["values"]:
+                totals[tuple(key)] = totals.get(tuple(key), 0) + value
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in sorted(totals.items())]
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"values": [[list(key), list(state)] for key, state in self._values.items()]}
+
+    def render(self, snapshots):
+        totals = {}
+        for snap in snapshots:
+            for key, state in snap["values"]:
+                current = totals.setdefault(tuple(key), [0] * len(state))
+                for i, value in enumerate(state):
+                    current[i] += value
+
+        lines = []
+        for key, state in sorted(totals.items()):
+            for bound, count in zip(self.buckets, state):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {round(state[-2], 6)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class Gauge:
+    """A value read at scrape time from `callback()`; per-worker, labelled by pid."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = ()
+
+    def snapshot(self):
+        try:
+            value = self.callback()
+        except Exception:
+            value = None
+        return {"pid": os.getpid(), "value": value}
+
+    def render(self, snapshots):
+        lines = []
+        for snap in snapshots:
+            if snap["value"] is None:
+                continue
+            extra = [('worker', snap["pid"])] if len(snapshots) > 1 else None
+            lines.append(f"{self.name}{_format_labels((), (), extra)} {snap['value']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, snapshot_dir=None, snapshot_interval=5):
+        self._metrics = []
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_interval = snapshot_interval
+        self._writer = None
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback):
+        return self._register(Gauge(name, documentation, callback))
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def start_snapshots(self):
+        """Write this worker's snapshot to `snapshot_dir` periodically (pre-fork mode)."""
+        if not self.snapshot_dir or self._writer is not None:
+            return
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+        def write_forever():
+            while True:
+                self._write_snapshot()
+                time.sleep(self.snapshot_interval)
+
+        self._writer = threading.Thread(target=write_forever, name='metrics-snapshots', daemon=True)
+        self._writer.start()
+
+    def _write_snapshot(self):
+        path = os.path.join(self.snapshot_dir, f"{os.getpid()}.json")
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"⚠️ Failed to write metrics snapshot: {e}")
+
+    def _other_snapshots(self):
+        """Snapshots written by other workers; gauges only from workers still running."""
+        if not self.snapshot_dir or self._writer is None:
+            return []
+        snapshots = []
+        try:
+            names = os.listdir(self.snapshot_dir)
+        except OSError:
+            return []
+        for name in names:
+            if not name.endswith('.json') or name == f"{os.getpid()}.json":
+                continue
+            try:
+                with open(os.path.join(self.snapshot_dir, name)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            # Counters of exited workers still count towards the totals
+            if not _pid_alive(int(name[:-5])):
+                snapshot = {key: value for key, value in snapshot.items() if "pid" not in value}
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        own = self.snapshot()
+        others = self._other_snapshots()
+        lines = []
+        for metric in self._metrics:
+            snapshots = [own[metric.name]] + [snap[metric.name] for snap in others if metric.name in snap]
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(snapshots))
+        return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def timed(timer, name):
+    """`timer.stage(name)`, or a no-op when there is no timer."""
+    return timer.stage(name) if timer is not None else contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    Wall-clock seconds per stage of one request. Stages may be recorded
+    from other threads (decode pool, scheduler), so updates are locked.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def observe(self, histogram, **labels):
+        """Record every stage into a histogram with a `stage` label."""
+        with self._lock:
+            stages = dict(self.stages)
+        for name, seconds in stages.items():
+            histogram.observe(seconds, stage=name, **labels)
+
+    def server_timing(self, total=None):
+        """`Server-Timing` header value, e.g. `decode;dur=12.3, inference;dur=840.0`."""
+        with self._lock:
+            stages = dict(self.stages)
+        if total is not None:
+            stages['total'] = total
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stages.items())
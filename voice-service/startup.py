@@ -0,0 +1,89 @@
+"""
+Background startup for the Voice Transcription Service
+
+Importing the app only builds the Flask app; the transcription backend is
+imported, loaded and warmed up on a background thread, so the server binds
+its port right away and `/health/live` answers while models are loading.
+`Startup` tracks that work step by step (status and duration of each) for
+`/health/ready`, which only returns 200 once every step has finished.
+"""
+
+import contextlib
+import threading
+import time
+
+
+class Startup:
+    """State: starting -> loading -> ready, or failed (with the error)."""
+
+    def __init__(self):
+        self.state = 'starting'
+        self.error = None
+        self.steps = []  # {"name", "status", "seconds"}
+        self._started = time.perf_counter()
+        self._ready_after = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    @property
+    def loading(self):
+        return self.state in ('starting', 'loading')
+
+    @contextlib.contextmanager
+    def step(self, name):
+        """Record one named step of the startup work and how long it took."""
+        entry = {"name": name, "status": "running", "seconds": None}
+        with self._lock:
+            self.steps.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            entry["status"] = "failed"
+            raise
+        else:
+            entry["status"] = "done"
+        finally:
+            entry["seconds"] = round(time.perf_counter() - start, 2)
+
+    def run(self, load, background=True):
+        """Run `load()` - on a daemon thread unless `background` is False - and record the outcome."""
+        def target():
+            self.state = 'loading'
+            try:
+                load()
+            except Exception as e:
+                self.error = str(e)
+                self.state = 'failed'
+                print(f"❌ Startup failed: {e}")
+            else:
+                self._ready_after = time.perf_counter() - self._started
+                self.state = 'ready'
+                print(f"✅ Ready in {self._ready_after:.1f}s")
+            finally:
+                self._done.set()
+
+        if background:
+            threading.Thread(target=target, name='startup', daemon=True).start()
+        else:
+            target()
+
+    def wait(self, timeout=None):
+        """Block until startup has finished (ready or failed). Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def status(self):
+        with self._lock:
+            steps = [dict(step) for step in self.steps]
+        return {
+            "status": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "uptimeSeconds": round(time.perf_counter() - self._started, 1),
+            "readyAfterSeconds": round(self._ready_after, 2) if self._ready_after is not None else None,
+            "steps": steps,
+        }
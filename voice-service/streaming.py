@@ -0,0 +1,133 @@
+"""
+Incremental transcription for live interview answers
+
+A `StreamingTranscriber` receives audio chunks while the candidate speaks and
+re-transcribes a sliding window of the not-yet-committed audio every
+`step_seconds`. Once the window grows past `window_seconds`, all but the
+most recent segments are committed (their text is final and the window start
+moves past them), so when the candidate stops only the short tail still has
+to be transcribed.
+
+Two input formats are supported:
+- `pcm16`: raw 16 kHz mono little-endian int16 (cheapest; from an AudioWorklet)
+- any container ffmpeg can read from a pipe (e.g. MediaRecorder webm/opus
+  chunks); the growing buffer is re-decoded on each step
+"""
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE, decode_audio, AudioDecodeError
+
+# Keep this much audio uncommitted at the end of the window - Whisper's last
+# words are the ones most likely to change when more audio arrives.
+COMMIT_MARGIN_SECONDS = 2.0
+
+
+class StreamingTranscriber:
+    def __init__(self, transcribe, audio_format='pcm16', language=None,
+                 step_seconds=1.0, window_seconds=20.0, max_duration=90):
+        self.transcribe = transcribe  # callable(audio, language) -> result dict
+        self.audio_format = audio_format
+        self.language = language
+        self.step_seconds = step_seconds
+        self.window_seconds = window_seconds
+        self.max_duration = max_duration
+
+        self._raw = bytearray()
+        self._decoded_bytes = 0
+        self._audio = np.zeros(0, dtype=np.float32)
+        self._committed_text = []
+        self._committed_samples = 0
+        self._last_step_samples = 0
+        self._pending_text = ''
+
+    @property
+    def duration(self):
+        return len(self._audio) / SAMPLE_RATE
+
+    @property
+    def over_limit(self):
+        return self.duration > self.max_duration
+
+    def add_chunk(self, data):
+        """
+        Append an audio chunk. Returns a partial result dict when a new
+        window was transcribed, otherwise None. Nothing is transcribed once
+        the audio is over max_duration (see `over_limit`).
+        """
+        self._raw.extend(data)
+        self._refresh_audio()
+        if self.over_limit:
+            return None
+
+        if len(self._audio) - self._last_step_samples < self.step_seconds * SAMPLE_RATE:
+            return None
+
+        self._last_step_samples = len(self._audio)
+        self._step()
+        return {"type": "partial", "text": self.text, "duration": round(self.duration, 2)}
+
+    def finish(self):
+        """Transcribe the remaining tail and return the final result."""
+        self._refresh_audio(final=True)
+        window = self._audio[self._committed_samples:]
+        if len(window) > 0:
+            result = self.transcribe(window, self.language)
+            self.language = self.language or result.get('language')
+            self._pending_text = result.get('text', '').strip()
+
+        text = self.text
+        return {
+            "type": "final",
+            "text": text,
+            "language": self.language or 'unknown',
+            "duration": round(self.duration, 2),
+            "wordCount": len(text.split()) if text else 0
+        }
+
+    @property
+    def text(self):
+        return " ".join(t for t in self._committed_text + [self._pending_text] if t).strip()
+
+    def _refresh_audio(self, final=False):
+        if self.audio_format == 'pcm16':
+            # Only convert the bytes that arrived since the last chunk
+            usable = len(self._raw) - len(self._raw) % 2
+            if usable > self._decoded_bytes:
+                new = np.frombuffer(bytes(self._raw[self._decoded_bytes:usable]), dtype='<i2')
+                self._audio = np.concatenate([self._audio, new.astype(np.float32) / 32768.0])
+                self._decoded_bytes = usable
+            return
+
+        # Container streams can only be decoded as a whole; a truncated tail
+        # may fail mid-stream, in which case we keep the previous decode.
+        if not final and len(self._audio) and len(self._raw) < self._decoded_bytes + 4096:
+            return
+        try:
+            self._audio = decode_audio(bytes(self._raw), self.audio_format)
+            self._decoded_bytes = len(self._raw)
+        except AudioDecodeError:
+            if final:
+                raise
+
+    def _step(self):
+        window = self._audio[self._committed_samples:]
+        result = self.transcribe(window, self.language)
+
+        # Pin the language after the first window so later steps skip detection
+        self.language = self.language or result.get('language')
+
+        segments = result.get('segments', [])
+        window_seconds = len(window) / SAMPLE_RATE
+
+        if window_seconds > self.window_seconds and len(segments) > 1:
+            cutoff = window_seconds - COMMIT_MARGIN_SECONDS
+            committed = [seg for seg in segments[:-1] if seg['end'] <= cutoff]
+            if committed:
+                self._committed_text.extend(seg['text'] for seg in committed)
+                self._committed_samples += int(committed[-1]['end'] * SAMPLE_RATE)
+                remaining = segments[len(committed):]
+                self._pending_text = " ".join(seg['text'] for seg in remaining).strip()
+                return
+
+        self._pending_text = result.get('text', '').strip()
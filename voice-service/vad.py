@@ -0,0 +1,137 @@
+"""
+Voice-activity detection pre-pass for the Voice Transcription Service
+
+Browser recordings usually carry seconds of leading/trailing silence and long
+thinking pauses. Whisper spends full encoder windows on all of it, so before
+transcription we find the speech spans with a lightweight energy detector,
+feed Whisper only those spans (joined with a short gap), and keep a map to
+translate timestamps back to the original recording.
+"""
+
+import numpy as np
+
+from audio_io import SAMPLE_RATE
+
+FRAME_MS = 30
+JOIN_GAP_SECONDS = 0.2  # silence inserted between kept spans so words don't run together
+
+
+class SpeechMap:
+    """Maps times in the trimmed (speech-only) audio back to the original recording."""
+
+    def __init__(self, spans, gap=JOIN_GAP_SECONDS):
+        self.spans = spans  # [(original_start, original_end), ...] in seconds
+        self.gap = gap
+        self._offsets = []
+        trimmed_start = 0.0
+        for start, end in spans:
+            self._offsets.append((trimmed_start, start, end - start))
+            trimmed_start += (end - start) + gap
+
+    @property
+    def speech_duration(self):
+        return sum(end - start for start, end in self.spans)
+
+    def to_original(self, t):
+        """Translate a trimmed-audio timestamp to the original timeline."""
+        if not self._offsets:
+            return t
+        for trimmed_start, original_start, length in reversed(self._offsets):
+            if t >= trimmed_start:
+                # Times that land in an inserted gap clamp to the end of the span
+                return original_start + min(t - trimmed_start, length)
+        return self._offsets[0][1]
+
+    def map_segments(self, segments):
+        return [
+            dict(segment,
+                 start=round(self.to_original(segment['start']), 2),
+                 end=round(self.to_original(segment['end']), 2))
+            for segment in segments
+        ]
+
+
+def detect_speech(audio, min_silence_ms=600, pad_ms=200, min_speech_ms=150, threshold_db=None):
+    """
+    Return speech spans [(start, end), ...] in seconds.
+
+    Frames are classified by RMS energy against an adaptive threshold (noise
+    floor + 12 dB, capped below the loudest frame, never under -50 dBFS).
+    Pauses shorter than `min_silence_ms` are kept inside a span; every span is
+    padded by `pad_ms` so word onsets/endings aren't clipped.
+    """
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return []
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+    if threshold_db is None:
+        noise_floor = np.percentile(energy_db, 10)
+        peak = np.max(energy_db)
+        threshold_db = max(-50.0, min(noise_floor + 12.0, peak - 25.0))
+
+    speech = energy_db > threshold_db
+    if not speech.any():
+        return []
+
+    # Collect runs of speech frames
+    runs = []
+    start = None
+    for i, is_speech in enumerate(speech):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            runs.append([start, i])
+            start = None
+    if start is not None:
+        runs.append([start, n_frames])
+
+    # Merge runs separated by short pauses
+    min_gap = max(1, min_silence_ms // FRAME_MS)
+    merged = [runs[0]]
+    for run in runs[1:]:
+        if run[0] - merged[-1][1] < min_gap:
+            merged[-1][1] = run[1]
+        else:
+            merged.append(run)
+
+    min_frames = max(1, min_speech_ms // FRAME_MS)
+    pad = pad_ms / 1000.0
+    total = len(audio) / SAMPLE_RATE
+    frame_seconds = FRAME_MS / 1000.0
+
+    spans = []
+    for start_frame, end_frame in merged:
+        if end_frame - start_frame < min_frames:
+            continue
+        start = max(0.0, start_frame * frame_seconds - pad)
+        end = min(total, end_frame * frame_seconds + pad)
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((start, end))
+    return spans
+
+
+def trim_to_speech(audio, **kwargs):
+    """
+    Cut the audio down to its speech spans.
+
+    Returns (trimmed_audio, SpeechMap). trimmed_audio is empty when no
+    speech was found.
+    """
+    spans = detect_speech(audio, **kwargs)
+    speech_map = SpeechMap(spans)
+    if not spans:
+        return np.zeros(0, dtype=np.float32), speech_map
+
+    gap = np.zeros(int(JOIN_GAP_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    pieces = []
+    for start, end in spans:
+        if pieces:
+            pieces.append(gap)
+        pieces.append(audio[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)])
+    return np.concatenate(pieces).astype(np.float32), speech_map